@@ -0,0 +1,372 @@
+"""Önceden toplanmış veri küpü ve küp üzerinden filtreleme/özet hesapları."""
+
+import numpy as np
+import pandas as pd
+
+from asm_mapping import TURKISH_TRANSLATION
+
+# Küp boyutları; 'asi' yüklenen dosyalarda yoksa atlanır.
+CUBE_DIMENSIONS = ['ilce', 'asm', 'birim', 'asi', 'doz', 'gun']
+
+# Başarı durumları (kırmızı, sarı, yeşil sırasıyla).
+STATUS_RED, STATUS_YELLOW, STATUS_GREEN = 'Acil Müdahale', 'Geliştirilmeli', 'Başarılı'
+STATUS_LABELS = [STATUS_RED, STATUS_YELLOW, STATUS_GREEN]
+
+# -----------------------------------------------------------------------------
+# KÜP OLUŞTURMA
+# -----------------------------------------------------------------------------
+
+def build_cube(df):
+    """Ham kayıtları (ilce, asm, birim, asi, doz, hedef günü) bazında hedef/yapılan sayılarına indirger.
+
+    Eksik değerli boyutlar da korunur (dropna=False); böylece genel toplamlar ham veriyle aynı kalır.
+    """
+    keys = {c: df[c] for c in CUBE_DIMENSIONS if c in df.columns and c != 'gun'}
+    keys['gun'] = df['hedef_tarih'].dt.normalize()
+    yapildi = df['yapilan_tarih'].notna().astype('int32')
+
+    cube = yapildi.groupby(list(keys.values()), observed=True, dropna=False, sort=False).agg(['size', 'sum'])
+    cube.index.names = list(keys)
+    cube.columns = ['hedef', 'yapilan']
+    cube = cube.reset_index()
+    cube['hedef'] = cube['hedef'].astype('int32')
+    cube['yapilan'] = cube['yapilan'].astype('int32')
+    return cube
+
+# -----------------------------------------------------------------------------
+# FİLTRELEME
+# -----------------------------------------------------------------------------
+
+def filter_mask(frame, ilce="Tümü", asm="Tümü", asilar=None, dozlar=None, date_range=None, date_col='gun'):
+    """Panel filtrelerini (küp ya da ham kayıt) satırlarına uygulayan boolean maskeyi döndürür."""
+    mask = np.ones(len(frame), dtype=bool)
+    if ilce != "Tümü": mask &= (frame['ilce'] == ilce).to_numpy()
+    if asm != "Tümü": mask &= (frame['asm'] == asm).to_numpy()
+    if asilar: mask &= frame['asi'].isin(asilar).to_numpy()
+    if dozlar: mask &= frame['doz'].isin(dozlar).to_numpy()
+    if date_range is not None and len(date_range) == 2:
+        # .dt.date yerine gün başı zaman damgalarıyla karşılaştırılır (nesne üretmeden).
+        baslangic = pd.Timestamp(date_range[0])
+        bitis = pd.Timestamp(date_range[1]) + pd.Timedelta(days=1)
+        mask &= ((frame[date_col] >= baslangic) & (frame[date_col] < bitis)).to_numpy()
+    return mask
+
+def filter_cube(cube, ilce="Tümü", asm="Tümü", asilar=None, dozlar=None, date_range=None):
+    """Panel filtrelerini küp satırlarına uygular; yalnızca eşleşen satırları döndürür."""
+    return cube[filter_mask(cube, ilce, asm, asilar, dozlar, date_range)]
+
+def filter_positions(df, ilce="Tümü", asm="Tümü", asilar=None, dozlar=None, date_range=None):
+    """Aynı filtrelere uyan ham kayıtların satır konumlarını döndürür (kayıt düzeyi dışa aktarım için).
+
+    Kayıtlar kopyalanmaz; dışa aktarım konumlardan parça parça okur.
+    """
+    return np.flatnonzero(filter_mask(df, ilce, asm, asilar, dozlar, date_range, date_col='hedef_tarih'))
+
+# -----------------------------------------------------------------------------
+# ÖZETLER
+# -----------------------------------------------------------------------------
+
+def totals(cube):
+    """Toplam hedef ve yapılan sayılarını döndürür."""
+    return int(cube['hedef'].sum()), int(cube['yapilan'].sum())
+
+def group_rates(cube, group_cols):
+    """Verilen sütunlara göre toplam/yapılan/oran tablosunu üretir (ham veri groupby'ı ile aynı)."""
+    ozet = cube.groupby(group_cols, observed=True)[['hedef', 'yapilan']].sum().reset_index()
+    ozet = ozet.rename(columns={'hedef': 'toplam'})
+    ozet['toplam'] = ozet['toplam'].astype('int64')
+    ozet['yapilan'] = ozet['yapilan'].astype('int64')
+    # Küçük özet tabloda kategoriler düz metne dönülür (grafik ve dışa aktarımlar için).
+    ozet[group_cols] = ozet[group_cols].astype(str)
+    ozet['oran'] = (ozet['yapilan'] / ozet['toplam'] * 100).round(2)
+    return ozet
+
+def unit_summary(cube):
+    """Birim bazında özet (ozet tablosu)."""
+    return group_rates(cube, ['ilce', 'asm', 'birim'])
+
+def classify_rates(rates, target, minimum):
+    """Oranları hedef/alt sınıra göre kategorik başarı durumuna çevirir (satır satır apply yerine).
+
+    oran < alt sınır (NaN dahil): Acil Müdahale, oran >= hedef: Başarılı, diğerleri: Geliştirilmeli.
+    Alt sınır hedeften büyük girilse de acil müdahale sayısı alt sınırın altındaki birimlerle aynı kalır.
+    """
+    values = np.asarray(rates, dtype='float64')
+    codes = np.select([~(values >= minimum), values >= target], [0, 2], default=1).astype('int8')
+    status = pd.Categorical.from_codes(codes, categories=STATUS_LABELS)
+    return pd.Series(status, index=getattr(rates, 'index', None), name='Durum')
+
+def risky_asm_table(ozet, target, minimum):
+    """En az bir acil müdahale birimi olan ASM'lerin kırmızı/sarı/yeşil birim sayıları.
+
+    Durumlar bir kez sınıflandırılır ve (ilce, asm, durum) üzerinde tek bir groupby ile
+    sayılır; sıralama (ilce, asm) grup sırasıdır.
+    """
+    status = classify_rates(ozet['oran'], target, minimum)
+    counts = status.groupby([ozet['ilce'].rename('İlçe'), ozet['asm'].rename('ASM Adı'), status], observed=True).size()
+    riskli = counts.unstack(fill_value=0).reindex(columns=STATUS_LABELS, fill_value=0)
+    riskli.columns = list(STATUS_LABELS)
+    riskli['Toplam Birim'] = riskli.sum(axis=1)
+    riskli = riskli[riskli[STATUS_RED] > 0].reset_index()
+    return riskli[['İlçe', 'ASM Adı', STATUS_RED, STATUS_YELLOW, STATUS_GREEN, 'Toplam Birim']].astype(
+        {c: 'int64' for c in STATUS_LABELS + ['Toplam Birim']})
+
+def _report_tables(hedef, yapilan, ozet, riskli, minimum, acil=None):
+    """Sonuç ekranındaki tabloları önceden hesaplanmış parçalardan derler."""
+    if acil is None:
+        acil = ozet[ozet['oran'] < minimum].sort_values(by='oran', kind='stable')
+    if not riskli.empty:
+        riskli = riskli.sort_values(by="Acil Müdahale", ascending=False)
+    return {
+        'hedef': hedef, 'yapilan': yapilan,
+        'genel_oran': (yapilan / hedef * 100) if hedef > 0 else 0,
+        'ozet': ozet,
+        'acil': acil,
+        'riskli_asm': riskli,
+    }
+
+def report_tables(cube, target, minimum):
+    """Filtrelenmiş küpten toplamları, birim özetini, acil birimleri ve riskli ASM listesini üretir."""
+    return UnitRates(cube).tables(target, minimum)
+
+def district_report_tables(cube, target, minimum):
+    """report_tables çıktısını tüm ilçeler için tek geçişte üretir: {ilce: tablolar}.
+
+    Birim özeti ve riskli ASM sayımı bir kez hesaplanıp ilçelere bölünür; sonuçlar
+    panelde o ilçe seçilerek alınan tablolarla aynıdır.
+    """
+    ozet = unit_summary(cube)
+    riskli = risky_asm_table(ozet, target, minimum)
+    ilce_totals = group_rates(cube, ['ilce']).set_index('ilce')
+    ozet_by_ilce = dict(tuple(ozet.groupby('ilce', sort=False)))
+    riskli_by_ilce = dict(tuple(riskli.groupby('İlçe', sort=False)))
+
+    tables = {}
+    for ilce, row in ilce_totals.iterrows():
+        if ilce not in ozet_by_ilce: continue
+        tables[ilce] = _report_tables(
+            int(row['toplam']), int(row['yapilan']), ozet_by_ilce[ilce].reset_index(drop=True),
+            riskli_by_ilce.get(ilce, riskli.iloc[0:0]).reset_index(drop=True), minimum
+        )
+    return tables
+
+# -----------------------------------------------------------------------------
+# EŞİK ANALİZİ (HIZLI YOL)
+# -----------------------------------------------------------------------------
+
+class RateIndex:
+    """Oranların sıralı kopyası; eşik sınırları ikili arama (searchsorted) ile bulunur.
+
+    Sınıflandırma classify_rates ile aynıdır, ancak eşik her değiştiğinde karşılaştırma
+    yapılmaz: yalnızca iki sınır konumu aranır ve kodlar sıralı dilimlere yazılır.
+    """
+
+    def __init__(self, rates):
+        values = np.asarray(rates, dtype='float64')
+        self.order = np.argsort(values, kind='stable')
+        self.sorted = values[self.order]
+        # NaN'lar sıralamanın sonunda kalır ve her zaman Acil Müdahale sayılır.
+        self.n_valid = int(np.count_nonzero(~np.isnan(values)))
+
+    def __len__(self):
+        return len(self.sorted)
+
+    def bounds(self, target, minimum):
+        """Sıralı dizide alt sınırın ve hedefin başladığı konumlar."""
+        valid = self.sorted[:self.n_valid]
+        return int(np.searchsorted(valid, minimum, side='left')), int(np.searchsorted(valid, target, side='left'))
+
+    def count_below(self, minimum):
+        """Oranı alt sınırın altında kalan kayıt sayısı (NaN hariç)."""
+        return self.bounds(minimum, minimum)[0]
+
+    def codes(self, target, minimum):
+        """Her kayıt için durum kodu: 0 kırmızı, 1 sarı, 2 yeşil (STATUS_LABELS sırası)."""
+        i_min, i_target = self.bounds(target, minimum)
+        sorted_codes = np.zeros(len(self.sorted), dtype='int8')
+        sorted_codes[i_min:self.n_valid] = 1
+        # Alt sınırın altı, hedef daha düşük olsa da kırmızı kalır.
+        sorted_codes[max(i_target, i_min):self.n_valid] = 2
+        codes = np.empty_like(sorted_codes)
+        codes[self.order] = sorted_codes
+        return codes
+
+    def status(self, target, minimum, index=None):
+        """Kategorik durum serisi."""
+        return pd.Series(pd.Categorical.from_codes(self.codes(target, minimum), categories=STATUS_LABELS),
+                         index=index, name='Durum')
+
+class UnitRates:
+    """Bir filtre seti için bir kez hesaplanan birim özeti; eşikler değiştikçe yalnızca yeniden sınıflandırılır."""
+
+    def __init__(self, cube):
+        self.hedef, self.yapilan = totals(cube)
+        self.genel_oran = (self.yapilan / self.hedef * 100) if self.hedef > 0 else 0
+        self.ozet = unit_summary(cube)
+        self.index = RateIndex(self.ozet['oran'])
+        # ASM grup kodları bir kez çıkarılır; sayımlar her eşikte bincount ile yapılır.
+        self.asm_codes, self.asm_keys = pd.MultiIndex.from_frame(self.ozet[['ilce', 'asm']]).factorize(sort=True)
+
+    def status(self, target, minimum):
+        return self.index.status(target, minimum, self.ozet.index)
+
+    def low_units(self, minimum):
+        """Alt sınırın altındaki birimler, orana göre artan sırada."""
+        return self.ozet.iloc[self.index.order[:self.index.count_below(minimum)]]
+
+    def risky_asms(self, target, minimum):
+        """risky_asm_table ile aynı tablo; groupby yerine önceden çıkarılmış grup kodlarıyla sayılır."""
+        codes = self.index.codes(target, minimum)
+        counts = np.bincount(self.asm_codes * 3 + codes, minlength=len(self.asm_keys) * 3).reshape(-1, 3)
+        keep = counts[:, 0] > 0
+        keys = self.asm_keys[keep]
+        return pd.DataFrame({
+            'İlçe': keys.get_level_values(0), 'ASM Adı': keys.get_level_values(1),
+            STATUS_RED: counts[keep, 0], STATUS_YELLOW: counts[keep, 1], STATUS_GREEN: counts[keep, 2],
+            'Toplam Birim': counts[keep].sum(axis=1),
+        })
+
+    def tables(self, target, minimum):
+        """report_tables ile aynı sözlük."""
+        return _report_tables(self.hedef, self.yapilan, self.ozet, self.risky_asms(target, minimum), minimum,
+                              acil=self.low_units(minimum))
+
+# -----------------------------------------------------------------------------
+# ZAMAN SERİLERİ
+# -----------------------------------------------------------------------------
+
+# Trend dönemleri: haftalık (ISO, pazartesi başlangıçlı), aylık ve çeyreklik.
+TREND_FREQS = {'W': 'Haftalık', 'M': 'Aylık', 'Q': 'Çeyreklik'}
+
+def period_codes(days, freq):
+    """1970'ten itibaren gün sayılarından tamsayı dönem kodları (metin biçimlendirme olmadan).
+
+    D: gün, W: pazartesi başlangıçlı hafta (1970-01-01 perşembedir), M: yıl*12+ay, Q: yıl*4+çeyrek.
+    """
+    days = np.asarray(days, dtype='int64')
+    if freq == 'D':
+        return days
+    if freq == 'W':
+        return (days + 3) // 7
+    months = days.astype('datetime64[D]').astype('datetime64[M]').astype('int64') + 1970 * 12
+    return months if freq == 'M' else months // 3
+
+def period_starts(codes, freq):
+    """Dönem kodlarının başlangıç tarihleri."""
+    codes = np.asarray(codes, dtype='int64')
+    if freq == 'D':
+        days = codes
+    elif freq == 'W':
+        days = codes * 7 - 3
+    else:
+        months = codes if freq == 'M' else codes * 3
+        days = (months - 1970 * 12).astype('datetime64[M]').astype('datetime64[D]').astype('int64')
+    return pd.DatetimeIndex(days.astype('datetime64[D]'))
+
+def period_labels(codes, freq):
+    """Dönem etiketleri: 2024-03-15, 2024-W11, 2024-03, 2024-Ç1 (yalnızca farklı kodlar için üretilir)."""
+    codes = np.asarray(codes, dtype='int64')
+    if freq == 'M':
+        return [f"{c // 12}-{c % 12 + 1:02d}" for c in codes]
+    if freq == 'Q':
+        return [f"{c // 4}-Ç{c % 4 + 1}" for c in codes]
+    starts = period_starts(codes, freq)
+    if freq == 'W':
+        iso = starts.isocalendar()
+        return [f"{y}-W{w:02d}" for y, w in zip(iso['year'], iso['week'])]
+    return [d.strftime('%Y-%m-%d') for d in starts]
+
+class TrendEngine:
+    """Bir filtre seti için zaman serileri.
+
+    Gün numaraları ve seri (aşı/doz) kodları küpten bir kez çıkarılır; her dönem/seri
+    birleşimi tamsayı kodlar üzerinde np.bincount ile toplanıp saklanır.
+    """
+
+    def __init__(self, cube):
+        self.hedef = cube['hedef'].to_numpy(dtype='float64')
+        self.yapilan = cube['yapilan'].to_numpy(dtype='float64')
+        self.days = cube['gun'].to_numpy(dtype='datetime64[D]').astype('int64')
+        self.series_source = {c: cube[c] for c in ('asi', 'doz') if c in cube.columns}
+        self._periods, self._series, self._trends = {}, {}, {}
+
+    def periods(self, freq):
+        if freq not in self._periods:
+            self._periods[freq] = period_codes(self.days, freq)
+        return self._periods[freq]
+
+    def series(self, by):
+        """Seri kodları ve adları (boş değerler ayrı bir seri olur)."""
+        if by not in self._series:
+            codes, names = pd.factorize(self.series_source[by], sort=True, use_na_sentinel=False)
+            self._series[by] = (codes, ["Belirtilmemiş" if pd.isna(n) else str(n) for n in names])
+        return self._series[by]
+
+    def trend(self, freq='M', by=None):
+        """Dönem (ve istenirse seri) bazında DONEM, BASLANGIC, [SERI], HEDEF, YAPILAN, ORAN tablosu."""
+        key = (freq, by)
+        if key in self._trends:
+            return self._trends[key]
+        codes = self.periods(freq)
+        if len(codes) == 0:
+            columns = ['DONEM', 'BASLANGIC'] + (['SERI'] if by else []) + ['HEDEF', 'YAPILAN', 'ORAN']
+            return self._trends.setdefault(key, pd.DataFrame(columns=columns))
+        first = int(codes.min())
+        n_periods = int(codes.max()) - first + 1
+        if by is None:
+            series_codes, names = np.zeros(len(codes), dtype='int64'), [None]
+        else:
+            series_codes, names = self.series(by)
+        index = series_codes.astype('int64') * n_periods + (codes - first)
+        size = len(names) * n_periods
+        hedef = np.bincount(index, weights=self.hedef, minlength=size).astype('int64')
+        yapilan = np.bincount(index, weights=self.yapilan, minlength=size).astype('int64')
+
+        # Hiç hedefi olmayan dönem/seri hücreleri atlanır (groupby çıktısıyla aynı satırlar).
+        cells = np.flatnonzero(hedef)
+        period = cells % n_periods + first
+        unique_periods, period_pos = np.unique(period, return_inverse=True)
+        data = {
+            'DONEM': np.asarray(period_labels(unique_periods, freq), dtype=object)[period_pos],
+            'BASLANGIC': period_starts(unique_periods, freq)[period_pos],
+        }
+        if by is not None:
+            data['SERI'] = np.asarray(names, dtype=object)[cells // n_periods]
+        data['HEDEF'], data['YAPILAN'] = hedef[cells], yapilan[cells]
+        trend_data = pd.DataFrame(data)
+        trend_data['ORAN'] = (trend_data['YAPILAN'] / trend_data['HEDEF'] * 100).round(2)
+        self._trends[key] = trend_data
+        return trend_data
+
+# -----------------------------------------------------------------------------
+# TABLO SAYFALAMA
+# -----------------------------------------------------------------------------
+
+def normalize_search(text):
+    """Arama metnini Türkçe karakterlerden arındırıp büyütür (kadıköy -> KADIKOY)."""
+    return str(text).translate(TURKISH_TRANSLATION).upper().strip()
+
+def search_text(frame, columns=None):
+    """Satır başına aranacak metin: sayısal olmayan sütunlar birleştirilip normalize_search ile sadeleştirilir."""
+    if columns is None:
+        columns = [c for c in frame.columns if not pd.api.types.is_numeric_dtype(frame[c])]
+    text = pd.Series('', index=frame.index, dtype=object)
+    for col in columns:
+        text = text + ' ' + frame[col].astype(str).astype(object)
+    return text.str.translate(TURKISH_TRANSLATION).str.upper()
+
+def table_rows(frame, query="", sort_by=None, ascending=True, search=None):
+    """Aramaya uyan satırların gösterim sırasındaki konumları (iloc dizisi).
+
+    search, frame ile aynı indeksli önceden hesaplanmış arama metnidir (ör. birim özetininki);
+    verilmezse frame'den üretilir. Sıralama kararlıdır; boş değerler sonda kalır.
+    """
+    positions = np.arange(len(frame))
+    query = normalize_search(query)
+    if query:
+        search = search_text(frame) if search is None else search.reindex(frame.index)
+        positions = positions[search.str.contains(query, regex=False).to_numpy(dtype=bool)]
+    if sort_by is not None and len(positions):
+        values = frame[sort_by].iloc[positions].reset_index(drop=True)
+        positions = positions[values.sort_values(ascending=ascending, kind='stable', na_position='last').index.to_numpy()]
+    return positions
@@ -1,213 +1,264 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import io
-import re
-from fpdf import FPDF
-import xlsxwriter
+import numpy as np
+import hashlib
 import os
+import uuid
+from collections import OrderedDict
+
+import analysis
+import asm_mapping
+import charts
+import ingest
+import perf
+import shared_store
+import snapshots
+from reports import create_pdf, to_excel
 
 # -----------------------------------------------------------------------------
 # 1. YARDIMCI FONKSİYONLAR (ASM EŞLEŞTİRME DAHİL)
 # -----------------------------------------------------------------------------
 
-def clean_turkish_chars(text):
-    """Türkçe karakterleri İngilizce karşılıklarına çevirir ve büyütür."""
-    if not isinstance(text, str): return str(text)
-    text = text.replace("İ", "I").replace("ı", "I")
-    text = text.replace("Ş", "S").replace("ş", "s")
-    text = text.replace("Ğ", "G").replace("ğ", "g")
-    text = text.replace("Ü", "U").replace("ü", "u")
-    text = text.replace("Ö", "O").replace("ö", "o")
-    text = text.replace("Ç", "C").replace("ç", "c")
-    return text.upper()
-
-def extract_key_from_unit_name(text):
-    """Birim adından ortak bir anahtar (KADIKOY-5) üretir."""
-    text = clean_turkish_chars(text)
-    text = re.sub(r'^ISTANBUL\s+', '', text)
-    match = re.search(r'(\d+)\s*NOLU', text)
-    if match:
-        number = int(match.group(1)) 
-        district_part = text[:match.start()].strip()
-        return f"{district_part}-{number}"
-    return None
-
-@st.cache_data
-def load_asm_mapping():
-    """Dizindeki ASM dosyasını arar ve eşleştirme sözlüğünü hazırlar."""
-    possible_files = ["ASM.xlsx", "ASM.csv", "ASM.xlsx - Sayfa1.csv", "asm_listesi.xlsx"]
-    df_asm = None
-    
-    for f in possible_files:
-        if os.path.exists(f):
-            try:
-                if f.endswith('.xlsx'):
-                    df_asm = pd.read_excel(f)
-                else:
-                    df_asm = pd.read_csv(f)
-                break
-            except:
-                continue
-    
-    if df_asm is None:
-        return None
-
-    df_asm.columns = [c.strip() for c in df_asm.columns]
-    col_birim = next((c for c in df_asm.columns if 'birim' in c.lower() and 'ad' in c.lower()), None)
-    col_asm = next((c for c in df_asm.columns if 'aile' in c.lower() and 'merkez' in c.lower()), None)
-    
-    if not col_birim or not col_asm:
-        return None
-        
-    mapping = {}
-    for _, row in df_asm.iterrows():
-        key = extract_key_from_unit_name(str(row[col_birim]))
-        if key:
-            mapping[key] = str(row[col_asm]).strip()
-            
-    return mapping
-
-def to_excel(df):
-    """Veriyi Excel formatına çevirir."""
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name='Sheet1')
-        worksheet = writer.sheets['Sheet1']
-        for i, col in enumerate(df.columns):
-            try:
-                max_len = max(df[col].astype(str).map(len).max(), len(col)) + 2
-                if max_len > 50: max_len = 50
-                worksheet.set_column(i, i, max_len)
-            except:
-                worksheet.set_column(i, i, 15)
-    return output.getvalue()
-
-def create_pdf(df, title, info):
-    """PDF Oluşturucu"""
-    class PDF(FPDF):
-        def header(self):
-            try: self.image('logo.png', 10, 8, 33)
-            except: pass
-            
-            self.set_y(10)
-            self.set_font('Arial', 'B', 16)
-            self.cell(0, 10, clean_text(title), 0, 1, 'C')
-            
-            self.set_font('Arial', '', 9)
-            self.set_text_color(80, 80, 80)
-            
-            date_str = f"Tarih: {info.get('tarih_araligi', '-')}"
-            ilce_txt = info.get('ilce', '-') if info.get('ilce') != "Tümü" else "Tum Ilceler"
-            asm_txt = info.get('asm', '-') if info.get('asm') != "Tümü" else "Tum ASM'ler"
-            asi_txt = info.get('asi', 'Tümü')
-            doz_txt = info.get('doz', '-') if info.get('doz') else "Tum Dozlar"
-            
-            filter_str = f"Konum: {ilce_txt} / {asm_txt} | Asi: {asi_txt} (Doz: {doz_txt})"
-            threshold_str = f"Hedef: %{info.get('hedef', 90)} | Alt Sinir: %{info.get('alt_sinir', 70)}"
-
-            self.ln(2)
-            self.cell(0, 5, clean_text(date_str), 0, 1, 'R')
-            self.cell(0, 5, clean_text(filter_str), 0, 1, 'R')
-            self.cell(0, 5, clean_text(threshold_str), 0, 1, 'R')
-            self.ln(3)
-
-            dusuk_sayisi = info.get('dusuk_birim_sayisi', 0)
-            
-            if info.get('sadece_sayi_goster') == True:
-                summary_text = f"ACIL MUDAHALE GEREKEN BIRIM SAYISI: {dusuk_sayisi}"
-            else:
-                if info.get('ilce') == "Tümü":
-                    basari_etiket = "IL GENEL BASARI ORANI"
-                else:
-                    basari_etiket = f"{clean_text(info.get('ilce')).upper()} BASARI ORANI"
-                
-                genel_oran = info.get('genel_basari_orani', 0)
-                summary_text = f"{basari_etiket}: %{genel_oran:.2f}   |   Acil Mudahale Gereken Birim: {dusuk_sayisi}"
-            
-            self.set_font('Arial', 'B', 11)
-            self.set_text_color(0, 0, 0)
-            self.set_fill_color(230, 230, 230)
-            self.cell(0, 10, summary_text, 0, 1, 'C', fill=True)
-            self.ln(5)
-            self.set_draw_color(150, 150, 150)
-            self.line(10, self.get_y(), 287, self.get_y())
-            self.ln(5)
-
-        def footer(self):
-            self.set_y(-15)
-            self.set_font('Arial', 'I', 8)
-            self.cell(0, 10, f'Sayfa {self.page_no()}', 0, 0, 'C')
-
-    def clean_text(text):
-        if not isinstance(text, str): return str(text)
-        text = text.replace("🔴", "").replace("🟢", "").replace("🟠", "").replace("✅", "").replace("⚠️", "").replace("🚨", "")
-        replacements = {
-            'ğ': 'g', 'Ğ': 'G', 'ş': 's', 'Ş': 'S', 'ı': 'i', 'İ': 'I', 
-            'ü': 'u', 'Ü': 'U', 'ö': 'o', 'Ö': 'O', 'ç': 'c', 'Ç': 'C'
-        }
-        for tr, eng in replacements.items():
-            text = text.replace(tr, eng)
-        return text.encode('latin-1', 'replace').decode('latin-1')
-
-    pdf = PDF(orientation='L', unit='mm', format='A4')
-    pdf.alias_nb_pages()
-    pdf.add_page()
-    
-    available_width = 275 
-    max_lens = []
-    for col in df.columns:
-        max_l = len(str(col))
-        for val in df[col].head(50):
-            val_l = len(str(val))
-            if val_l > max_l: max_l = val_l
-        if col in ['asm', 'birim', 'ASM Adı']:
-            if max_l > 35: max_l = 35 
-        if col in ['Başarı Durumu', 'Durum']:
-            if max_l < 20: max_l = 25
-        max_lens.append(max_l)
-    
-    total_len = sum(max_lens)
-    col_widths = []
-    if total_len > 0:
-        for l in max_lens:
-            w = (l / total_len) * available_width
-            if w < 20: w = 20
-            col_widths.append(w)
+def value_nbytes(value, depth=0, seen=None):
+    """Oturumda tutulan bir değerin tablo ve dizilerinin yaklaşık boyutu (bayt).
+
+    seen verilirse aynı nesne (ör. hem filter_result hem filtre önbelleğindeki sonuç) bir kez sayılır.
+    """
+    if seen is not None:
+        if id(value) in seen:
+            return 0
+        seen.add(id(value))
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(np.sum(value.memory_usage(index=True, deep=True)))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if depth >= 4:
+        return 0
+    if isinstance(value, dict):
+        return sum(value_nbytes(v, depth + 1, seen) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(value_nbytes(v, depth + 1, seen) for v in value)
+    if isinstance(value, (analysis.UnitRates, analysis.RateIndex, analysis.TrendEngine)):
+        return sum(value_nbytes(v, depth + 1, seen) for v in vars(value).values())
+    return 0
+
+def session_memory_mb():
+    """Oturumda tutulan tablo ve dizilerin (filtre önbelleği dahil) toplam bellek kullanımını (MB) döndürür."""
+    seen = set()
+    total = sum(value_nbytes(value, seen=seen) for value in st.session_state.values())
+    return total / (1024 * 1024)
+
+@st.cache_resource
+def get_dataset_registry():
+    """Tüm oturumların ortak kullandığı veri kaydını döndürür."""
+    return shared_store.DatasetRegistry()
+
+def export_cache(meta):
+    """Geçerli filtre/eşik seti için dışa aktarım önbelleğini döndürür; set değişince boşaltılır."""
+    dataset_key = st.session_state.dataset.key if st.session_state.get('dataset') else ""
+    meta_hash = hashlib.sha256(repr((dataset_key, sorted(meta.items()))).encode('utf-8')).hexdigest()
+    if st.session_state.get('export_cache_key') != meta_hash:
+        st.session_state.export_cache = {}
+        st.session_state.export_cache_key = meta_hash
+    return st.session_state.export_cache
+
+def lazy_export(cache, name, build, timer=perf.NULL, rows=None):
+    """Dosyayı yalnızca indirme anında üretir; aynı filtre için tekrar indirmede önbellekten döner.
+
+    Dönen fonksiyon download_button tarafından ayrı bir iş parçacığında çağrılır;
+    bu yüzden session_state yerine önceden alınmış önbellek sözlüğünü kullanır.
+    """
+    build = timed_export(timer, name, build, rows)
+    def _data():
+        if name not in cache:
+            cache[name] = build()
+        return cache[name]
+    return _data
+
+def timed_export(timer, name, build, rows=None):
+    """Dışa aktarım fonksiyonunu ölçüm adımıyla sarar (ölçüm kapalıysa olduğu gibi döner)."""
+    if timer is perf.NULL:
+        return build
+    def _build():
+        with timer.stage(f"Dışa aktarım: {name}", rows) as rec:
+            data = build()
+            rec['nbytes'] = len(data)
+        return data
+    return _build
+
+# Oturum başına saklanan, eşikten bağımsız filtre sonucu sayısı ve bu sonuçların bellek bütçesi
+# (ASI_FILTER_CACHE_MB). Bütçe aşılırsa en son kullanılan dışındaki sonuçlar atılır.
+FILTER_CACHE_SIZE = 2
+FILTER_CACHE_MB = int(os.environ.get("ASI_FILTER_CACHE_MB", "64"))
+
+def filter_results(cube, params, timer=perf.NULL):
+    """Filtre setinin eşikten bağımsız sonuçlarını (birim oranları, grafik verisi) döndürür.
+
+    Sonuçlar oturumda filtre seti başına saklanır; aynı filtreler yeniden uygulandığında
+    maskeler ve groupby'lar tekrar çalışmaz. Filtrelenmiş küp saklanmaz; yalnızca küçük
+    özetler ve eşleşen satırların konumları tutulur (trend bunlardan ilk istendiğinde kurulur).
+    """
+    key = repr((st.session_state.dataset.key, sorted(params.items())))
+    cache = st.session_state.setdefault('filter_cache', OrderedDict())
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+
+    with timer.stage("Filtre maskesi", len(cube)) as rec:
+        mask = analysis.filter_mask(cube, **params)
+        positions = np.flatnonzero(mask).astype(np.int32 if len(cube) < 2**31 else np.int64)
+        rec['rows_out'] = len(positions)
+    res = {'positions': positions, 'rates': None}
+    if len(positions):
+        cube_res = cube[mask]
+        with timer.stage("ozet (groupby)", len(cube_res)) as rec:
+            res['rates'] = analysis.UnitRates(cube_res)
+            rec['rows_out'] = len(res['rates'].ozet)
+        # İlçe seçilmemişse grafik ilçe, seçilmişse birim bazındadır.
+        res['group_col'] = 'ilce' if params['ilce'] == "Tümü" else 'birim'
+        with timer.stage("chart_data (groupby)", len(cube_res)) as rec:
+            chart_data = analysis.group_rates(cube_res, [res['group_col']]).sort_values(by='oran', ascending=False)
+            rec['rows_out'] = len(chart_data)
+            if res['group_col'] == 'birim':
+                # Birim sayısı çubuk sınırını aşarsa kullanılacak ASM toplamları.
+                asm_rates = analysis.group_rates(cube_res, ['asm']).sort_values(by='oran', ascending=False, kind='stable')
+                res['asm_chart_data'] = asm_rates.reset_index(drop=True)
+        res['chart_data'] = chart_data
+        res['chart_index'] = analysis.RateIndex(chart_data['oran'])
+        del cube_res
+
+    cache[key] = res
+    trim_filter_cache(cache)
+    return res
+
+def trim_filter_cache(cache):
+    """Filtre önbelleğini adet ve bellek sınırına indirir; en son kullanılan sonuç her zaman kalır."""
+    while len(cache) > FILTER_CACHE_SIZE:
+        cache.popitem(last=False)
+    budget = FILTER_CACHE_MB * 1024 * 1024
+    while len(cache) > 1 and value_nbytes(cache) > budget:
+        cache.popitem(last=False)
+
+def trend_engine(res, cube, timer=perf.NULL):
+    """Filtre sonucunun trend motorunu ilk istendiğinde saklanan satır konumlarından kurar."""
+    if 'trend' not in res:
+        columns = [c for c in ('hedef', 'yapilan', 'gun', 'asi', 'doz') if c in cube.columns]
+        # Dönem/seri kodları burada bir kez çıkarılır; seriler ilk istendiklerinde hesaplanıp saklanır.
+        with timer.stage("Trend kodları", len(res['positions'])):
+            res['trend'] = analysis.TrendEngine(cube[columns].take(res['positions']))
+        trim_filter_cache(st.session_state.filter_cache)
+    return res['trend']
+
+# Filtre sonucu başına saklanan grafik şekli sayısı (eşik/görünüm kombinasyonları).
+FIGURE_CACHE_SIZE = 8
+
+def chart_figures(res, mode, target, minimum, max_bars, timer=perf.NULL):
+    """Performans grafiğini filtre sonucunun içinde saklar; aynı filtre/eşik/görünüm için yeniden kurulmaz."""
+    cache = res.setdefault('figures', OrderedDict())
+    key = (mode, target, minimum, max_bars)
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+    with timer.stage("Grafik şekilleri", len(res['chart_data'])) as rec:
+        cache[key] = charts.performance_figures(res, mode, target, minimum, max_bars)
+        rec['rows_out'] = sum(len(trace.x) for fig in cache[key][1] for trace in fig.data)
+    while len(cache) > FIGURE_CACHE_SIZE:
+        cache.popitem(last=False)
+    return cache[key]
+
+# Başarı durumu hücre renkleri (kategori sırasıyla: kırmızı, sarı, yeşil).
+STATUS_CSS = {
+    analysis.STATUS_GREEN: 'background-color: #cfe2ff; color: #084298',
+    analysis.STATUS_YELLOW: 'background-color: #fff3cd; color: #856404',
+    analysis.STATUS_RED: 'background-color: #f8d7da; color: #721c24',
+}
+
+def status_styles(column):
+    """Durum sütununun stillerini hücre hücre değil, kategori kodları üzerinden tek seferde üretir."""
+    css = np.array([STATUS_CSS.get(c, '') for c in column.cat.categories] + [''], dtype=object)
+    return css[column.cat.codes.to_numpy()]
+
+# Tablo sayfa boyutu seçenekleri; tarayıcıya yalnızca görünen sayfa gönderilir.
+PAGE_SIZES = [25, 50, 100, 250]
+DEFAULT_SORT = "(Varsayılan sıra)"
+
+def paged_table(frame, key, column_config=None, search=None, style=None):
+    """Tabloyu sayfa sayfa gösterir; arama, sıralama ve dilimleme sunucuda yapılır.
+
+    search: frame ile aynı indeksli önceden hesaplanmış arama metni (bkz. analysis.search_text).
+    style: yalnızca görünen sayfaya uygulanan Styler fonksiyonu (tüm tablo stillendirilmez).
+    """
+    c_ara, c_sirala, c_yon, c_boyut = st.columns([3, 2, 1, 1])
+    query = c_ara.text_input("🔍 Ara", key=f"{key}_ara", placeholder="İlçe, ASM ya da birim adı")
+    sort_by = c_sirala.selectbox("Sırala", [DEFAULT_SORT] + list(frame.columns), key=f"{key}_sirala")
+    ascending = c_yon.selectbox("Yön", ["Artan", "Azalan"], key=f"{key}_yon") == "Artan"
+    page_size = c_boyut.selectbox("Satır", PAGE_SIZES, index=1, key=f"{key}_boyut")
+
+    rows = analysis.table_rows(frame, query, None if sort_by == DEFAULT_SORT else sort_by, ascending, search)
+    n_pages = max(1, -(-len(rows) // page_size))
+    # Arama/sıralama değişince ya da tablo küçülünce (ör. eşik değişimi) geçerli bir sayfaya dönülür.
+    # Tablo bir çalıştırmada gösterilmezse Streamlit sayfa girdisinin durumunu siler; o zaman da başa dönülür.
+    page_key, view_key = f"{key}_sayfa", f"{key}_gorunum"
+    view = (query, sort_by, ascending, page_size)
+    if (page_key not in st.session_state or st.session_state.get(view_key) != view
+            or st.session_state[page_key] > n_pages):
+        st.session_state[view_key] = view
+        st.session_state[page_key] = 1
+
+    page_rows = rows[(st.session_state[page_key] - 1) * page_size:st.session_state[page_key] * page_size]
+    page = frame.iloc[page_rows]
+    st.dataframe(style(page) if style else page, column_config=column_config, use_container_width=True, hide_index=True)
+
+    c_bilgi, c_sayfa = st.columns([3, 1])
+    if len(rows):
+        start = (st.session_state[page_key] - 1) * page_size
+        sayi = lambda n: f"{n:,}".replace(",", ".")
+        c_bilgi.caption(f"{sayi(len(rows))} kayıttan {sayi(start + 1)}-{sayi(start + len(page_rows))} arası gösteriliyor"
+                        + (f" (toplam {sayi(len(frame))})" if len(rows) != len(frame) else "") + ".")
     else:
-        col_widths = [available_width]
-
-    final_total = sum(col_widths)
-    if final_total > available_width:
-        factor = available_width / final_total
-        col_widths = [w * factor for w in col_widths]
-
-    pdf.set_font("Arial", 'B', 9)
-    pdf.set_fill_color(220, 230, 240)
-    pdf.set_text_color(0, 0, 0)
-    for i, col in enumerate(df.columns):
-        pdf.cell(col_widths[i], 10, clean_text(col), 1, 0, 'C', fill=True)
-    pdf.ln()
-
-    pdf.set_font("Arial", '', 8)
-    for _, row in df.iterrows():
-        if pdf.get_y() > 175:
-            pdf.add_page()
-            pdf.set_font("Arial", 'B', 9)
-            pdf.set_fill_color(220, 230, 240)
-            for i, col in enumerate(df.columns):
-                pdf.cell(col_widths[i], 10, clean_text(col), 1, 0, 'C', fill=True)
-            pdf.ln()
-            pdf.set_font("Arial", '', 8)
-
-        for i, item in enumerate(row):
-            text = clean_text(str(item))
-            max_char = int(col_widths[i] / 1.8) 
-            if len(text) > max_char: text = text[:max_char-2] + ".."
-            pdf.cell(col_widths[i], 8, text, 1, 0, 'C')
-        pdf.ln()
-
-    return pdf.output(dest='S').encode('latin-1')
+        c_bilgi.caption("Aramaya uyan kayıt yok.")
+    c_sayfa.number_input(f"Sayfa (/{n_pages})", min_value=1, max_value=n_pages, key=page_key)
+
+def read_file(path):
+    """Hazır rapor dosyasını okuyup hemen kapatır (indirme anında çağrılır)."""
+    with open(path, 'rb') as f:
+        return f.read()
+
+@st.cache_resource(max_entries=2, show_spinner="Yayınlanmış veri açılıyor...")
+def load_snapshot(version):
+    """Çevrimdışı yayınlanan sürümü süreç başına bir kez okur; tüm oturumlar aynı veriyi paylaşır."""
+    return snapshots.open_snapshot(version)
+
+def reset_results():
+    """Veri kümesi değiştiğinde eski veriye ait filtre sonuçlarını ve dışa aktarımları bırakır.
+
+    Kullanıcı filtreleri yeni veri üzerinde yeniden uygulayana kadar sonuç ekranı gösterilmez.
+    """
+    for key in ('filter_result', 'filter_params', 'filter_info', 'filter_cache', 'export_cache', 'export_cache_key'):
+        st.session_state.pop(key, None)
+    st.session_state.has_run = False
+
+def use_snapshot(snapshot):
+    """Oturumu yayınlanmış sürüme bağlar: veri ve küp hazır olduğu için okuma/normalizasyon yapılmaz."""
+    registry = get_dataset_registry()
+    cube_key = f"{snapshot.key}_kup"
+    reset_results()
+    st.session_state.dataset = registry.acquire(snapshot.key) or registry.put(snapshot.key, snapshot.frame)
+    st.session_state.cube = registry.acquire(cube_key) or registry.put(cube_key, snapshot.cube)
+    st.session_state.content_keys = {}
+    st.session_state.file_errors = {}
+    st.session_state.file_keys = [snapshot.key]
+    st.session_state.asm_fp = snapshot.manifest.get('asm_fp')
+    st.session_state.unmatched_units = snapshot.unmatched
+    st.session_state.snapshot_version = snapshot.version
+
+def get_perf_timer():
+    """Ölçüm açıksa (?perf=1 ya da ASI_PERF=1) oturumun zamanlayıcısını, değilse boş zamanlayıcıyı döndürür."""
+    if not perf.enabled(st.query_params.get("perf")):
+        return perf.NULL
+    if 'perf_timer' not in st.session_state:
+        st.session_state.perf_timer = perf.StageTimer(session=uuid.uuid4().hex[:8])
+    return st.session_state.perf_timer
 
 # -----------------------------------------------------------------------------
 # 2. SAYFA AYARLARI
@@ -221,76 +272,151 @@ with st.sidebar:
 st.title("📊 Aşı Takip & Performans Dashboard")
 st.markdown("---")
 
+timer = get_perf_timer()
+timer.next_run()
+
 # -----------------------------------------------------------------------------
 # 3. VERİ YÜKLEME (ÇOKLU DOSYA DESTEĞİ)
 # -----------------------------------------------------------------------------
 st.sidebar.header("1. Veri Yükleme")
 uploaded_files = st.sidebar.file_uploader("Excel veya CSV Yükleyin", type=["xlsx", "csv"], accept_multiple_files=True, key="loader_main")
 
-if 'filtered_df' not in st.session_state: st.session_state.filtered_df = pd.DataFrame()
 if 'has_run' not in st.session_state: st.session_state.has_run = False
 
-if uploaded_files:
-    current_file_names = [f.name for f in uploaded_files]
+# Dosya yüklenmemişse çevrimdışı hazırlanan son sürüm salt okunur açılır (bkz. snapshots.py).
+# Oturum açtığı sürümde kalır; yeni sürüm yayınlandığında kullanıcı isterse geçer.
+snapshot = None
+if not uploaded_files:
+    latest_version = snapshots.current_version()
+    pinned_version = st.session_state.get('snapshot_version')
+    if pinned_version:
+        snapshot = load_snapshot(pinned_version)
+    if snapshot is None and latest_version:
+        snapshot = load_snapshot(latest_version)
+
+if uploaded_files or snapshot is not None:
+    if snapshot is not None:
+        if st.session_state.get('file_keys') != [snapshot.key]:
+            use_snapshot(snapshot)
+        manifest = snapshot.manifest
+        kayit = f"{manifest['rows']:,}".replace(",", ".")
+        st.sidebar.caption(f"📦 Yayınlanmış veri: {snapshot.version} · {len(manifest['files'])} dosya, "
+                           f"{kayit} kayıt ({manifest['created'].replace('T', ' ')})")
+        # Varsayılan eşiklerle önceden üretilmiş il geneli raporlar; dosya yalnızca indirilirken okunur.
+        hazir_raporlar = snapshot.province_reports()
+        if hazir_raporlar:
+            with st.sidebar.expander(f"📄 Hazır raporlar (%{manifest['hedef']} / %{manifest['alt_sinir']})"):
+                for i, rapor in enumerate(hazir_raporlar):
+                    st.download_button(os.path.basename(rapor), data=lambda path=rapor: read_file(path),
+                                       file_name=os.path.basename(rapor), key=f"hazir_{i}", on_click="ignore")
+        if latest_version and latest_version != snapshot.version:
+            st.sidebar.info("🔄 Daha yeni bir veri sürümü yayınlandı.")
+            if st.sidebar.button("Yeni sürüme geç"):
+                st.session_state.snapshot_version = latest_version
+                st.rerun()
+    else:
+        current_keys = [ingest.upload_key(f) for f in uploaded_files]
+        # Derlenmiş ASM indeksi her çalıştırmada yalnızca dosya damgasıyla denetlenir;
+        # ASM dosyası değiştiğinde indeks yeniden derlenir ve veri yeni eşleştirmeyle yüklenir.
+        asm_map = asm_mapping.load_asm_mapping()
+        asm_fp = ingest.mapping_fingerprint(asm_map)
+        asm_changed = st.session_state.get('asm_fp') != asm_fp
     
-    if 'raw_data' not in st.session_state or st.session_state.get('file_names') != current_file_names:
-        try:
-            all_dfs = []
+        # Veri, süreç genelindeki paylaşılan kayıtta tutulur; oturum yalnızca bir tutamak saklar.
+        # Artımlı yükleme: yalnızca kayıtta ve disk önbelleğinde olmayan dosyalar ayrıştırılır.
+        if 'dataset' not in st.session_state or st.session_state.get('file_keys') != current_keys or asm_changed:
+            registry = get_dataset_registry()
+            content_keys = {} if asm_changed else st.session_state.get('content_keys', {})
+            content_keys = {k: v for k, v in content_keys.items() if k in current_keys}
+            file_errors = {} if asm_changed else st.session_state.get('file_errors', {})
+            file_errors = {k: v for k, v in file_errors.items() if k in current_keys}
             for uploaded_file in uploaded_files:
-                if uploaded_file.name.endswith('.csv'):
-                    temp_df = pd.read_csv(uploaded_file, encoding='cp1254')
-                else:
-                    temp_df = pd.read_excel(uploaded_file)
-                
-                temp_df.columns = [c.strip() for c in temp_df.columns]
-                
-                # ASI_ADI eklendi
-                rename_map = {
-                    'ILCE': 'ilce', 'asm': 'asm', 'BIRIM_ADI': 'birim', 
-                    'ASI_SON_TARIH': 'hedef_tarih', 'ASI_YAP_TARIH': 'yapilan_tarih', 
-                    'ASI_DOZU': 'doz', 'ASI_ADI': 'asi'
-                }
-                temp_df = temp_df.rename(columns={k: v for k, v in rename_map.items() if k in temp_df.columns})
-                all_dfs.append(temp_df)
-            
-            df = pd.concat(all_dfs, ignore_index=True)
+                key = ingest.upload_key(uploaded_file)
+                if key not in content_keys:
+                    content_keys[key] = ingest.content_key(uploaded_file.getvalue(), asm_fp)
+        
+            ok_keys = [k for k in current_keys if k not in file_errors]
+            handle = registry.acquire(shared_store.combined_key([content_keys[k] for k in ok_keys]))
+        
+            if handle is None:
+                frames, to_load, queued = {}, [], set()
+                for uploaded_file in uploaded_files:
+                    key = ingest.upload_key(uploaded_file)
+                    ck = content_keys[key]
+                    if key in file_errors or ck in frames or ck in queued: continue
+                    shared = registry.peek(ck)
+                    if shared is not None:
+                        frames[ck] = shared
+                    else:
+                        queued.add(ck)
+                        to_load.append((ck, uploaded_file.name, uploaded_file.getvalue(), ingest.content_key_hash(ck)))
             
-            # --- EKSİK ASM EŞLEŞTİRME ---
-            asm_map = load_asm_mapping()
+                if to_load:
+                    progress = st.sidebar.progress(0.0, text="Dosyalar okunuyor...")
+                    def on_progress(done, total, name):
+                        progress.progress(done / total, text=f"{done}/{total} dosya okundu ({name})")
+                    # Aynı içerik daha önce işlendiyse normalize edilmiş hâli önbellekten gelir;
+                    # diğerleri süreç havuzunda paralel ayrıştırılır.
+                    new_frames, new_errors = ingest.load_files(to_load, asm_map, on_progress=on_progress, timer=timer)
+                    progress.empty()
+                    for ck, frame in new_frames.items():
+                        registry.put(ck, frame)
+                    frames.update(new_frames)
+                    for key in current_keys:
+                        if content_keys[key] in new_errors: file_errors[key] = new_errors[content_keys[key]]
             
-            if asm_map and 'birim' in df.columns:
-                df['temp_key'] = df['birim'].apply(lambda x: extract_key_from_unit_name(str(x)))
-                df['mapped_asm'] = df['temp_key'].map(asm_map)
+                ok_keys = [k for k in current_keys if k not in file_errors]
+                if ok_keys:
+                    parts = [frames[content_keys[k]] for k in ok_keys]
+                    df = ingest.concat_compact(parts) if len(parts) > 1 else parts[0]
+                    handle = registry.put(shared_store.combined_key([content_keys[k] for k in ok_keys]), df)
                 
-                if 'asm' not in df.columns:
-                    df['asm'] = df['mapped_asm']
-                else:
-                    df['asm'] = df['asm'].fillna(df['mapped_asm'])
-                
-                df = df.drop(columns=['temp_key', 'mapped_asm'], errors='ignore')
-
-            if 'asm' not in df.columns:
-                st.warning("⚠️ Yüklenen dosyalarda ASM sütunu yok ve eşleştirme dosyası (ASM.xlsx) bulunamadı.")
-                df['asm'] = "Belirtilmemiş"
-            else:
-                df['asm'] = df['asm'].fillna("Belirtilmemiş")
-
-            if 'doz' in df.columns:
-                df['doz'] = pd.to_numeric(df['doz'], errors='coerce').fillna(0).astype(int)
-            else:
-                df['doz'] = 1
-            
-            df['hedef_tarih'] = pd.to_datetime(df['hedef_tarih'], errors='coerce')
-            df['yapilan_tarih'] = pd.to_datetime(df['yapilan_tarih'], errors='coerce')
-            df = df.dropna(subset=['hedef_tarih'])
-            
-            st.session_state.raw_data = df
-            st.session_state.file_names = current_file_names
-        except Exception as e:
-            st.error(f"Dosya okuma hatası: {e}")
-            st.stop()
+                    if not df.empty and not asm_map and (df['asm'] == "Belirtilmemiş").all():
+                        st.warning("⚠️ Yüklenen dosyalarda ASM sütunu yok ve eşleştirme dosyası (ASM.xlsx) bulunamadı.")
+        
+            # Filtreler ve özetler ham satırlar yerine bir kez hesaplanan küp üzerinden yanıtlanır.
+            cube_handle = None
+            if handle is not None:
+                cube_key = f"{handle.key}_kup"
+                cube_handle = registry.acquire(cube_key)
+                if cube_handle is None:
+                    with st.spinner('Veri küpü hazırlanıyor...'), timer.stage("Küp (groupby)", len(handle.frame)) as rec:
+                        cube_handle = registry.put(cube_key, analysis.build_cube(handle.frame))
+                        rec['rows_out'] = len(cube_handle.frame)
+        
+            # Eşleştirme boşlukları: ASM'si ne dosyada ne de ASM listesinde bulunan birimler.
+            unmatched = None
+            if cube_handle is not None and asm_map:
+                eksik = (cube_handle.frame['asm'] == "Belirtilmemiş").to_numpy()
+                unmatched = asm_mapping.unmatched_units(cube_handle.frame['birim'][eksik], cube_handle.frame['hedef'][eksik])
+        
+            onceki = st.session_state.get('dataset')
+            if onceki is None or handle is None or onceki.key != handle.key:
+                reset_results()
+            st.session_state.dataset = handle
+            st.session_state.cube = cube_handle
+            st.session_state.content_keys = content_keys
+            st.session_state.file_errors = file_errors
+            st.session_state.file_keys = current_keys
+            st.session_state.asm_fp = asm_fp
+            st.session_state.unmatched_units = unmatched
+
+    for uploaded_file in uploaded_files or []:
+        hata = st.session_state.file_errors.get(ingest.upload_key(uploaded_file))
+        if hata: st.sidebar.error(f"Dosya okuma hatası ({uploaded_file.name}): {hata}")
+    
+    eksik_birimler = st.session_state.get('unmatched_units')
+    if eksik_birimler is not None and not eksik_birimler.empty:
+        with st.sidebar.expander(f"⚠️ ASM'si bulunamayan birimler ({len(eksik_birimler)})"):
+            st.caption("Bu birimlerin kayıtları 'Belirtilmemiş' ASM altında raporlanır. ASM listesini güncelleyin.")
+            st.dataframe(eksik_birimler, hide_index=True, use_container_width=True)
+    
+    if st.session_state.dataset is None:
+        st.error("Yüklenen dosyaların hiçbiri okunamadı.")
+        st.stop()
 
-    df = st.session_state.raw_data
+    df = st.session_state.dataset.frame
+    cube = st.session_state.cube.frame
 
     # -----------------------------------------------------------------------------
     # 4. FİLTRELEME
@@ -299,19 +425,19 @@ if uploaded_files:
     with st.sidebar.form(key='filter_form'):
         
         # İlçe Filtresi
-        ilce_list = ["Tümü"] + sorted(df['ilce'].astype(str).unique().tolist())
+        ilce_list = ["Tümü"] + sorted(cube['ilce'].astype(str).unique().tolist())
         selected_ilce = st.selectbox("İlçe Seç", ilce_list)
         
         # ASM Filtresi
-        if selected_ilce != "Tümü": asm_source = df[df['ilce'] == selected_ilce]
-        else: asm_source = df
+        if selected_ilce != "Tümü": asm_source = cube.loc[cube['ilce'] == selected_ilce, 'asm']
+        else: asm_source = cube['asm']
         
-        asm_list = ["Tümü"] + sorted(asm_source['asm'].astype(str).unique().tolist())
+        asm_list = ["Tümü"] + sorted(asm_source.astype(str).unique().tolist())
         selected_asm = st.selectbox("ASM Seç", asm_list)
 
         # Aşı Filtresi (YENİ)
-        if 'asi' in df.columns:
-            asi_list = sorted(df['asi'].astype(str).unique().tolist())
+        if 'asi' in cube.columns:
+            asi_list = sorted(cube['asi'].astype(str).unique().tolist())
             selected_asilar = st.multiselect("Aşı Seçin", options=asi_list, default=[])
         else:
             selected_asilar = []
@@ -321,51 +447,53 @@ if uploaded_files:
         selected_doses = st.multiselect("Aşı Dozu Seçin", options=dose_options, default=[])
 
         # Tarih Filtresi
-        if not df.empty:
-            min_date = df['hedef_tarih'].min().date()
-            max_date = df['hedef_tarih'].max().date()
+        if not cube.empty:
+            min_date = cube['gun'].min().date()
+            max_date = cube['gun'].max().date()
             date_range = st.date_input("Tarih Aralığı", [min_date, max_date])
         else:
             st.stop()
 
-        target_val = st.number_input("Hedef Başarı (%)", value=90)
-        min_val = st.number_input("Alt Sınır (%)", value=70)
-        
         st.markdown("---")
         submit_button = st.form_submit_button(label='🚀 Filtreleri Uygula')
 
+    # Eşikler formun dışındadır: değiştirildiğinde filtreler yeniden uygulanmaz,
+    # önbellekteki birim oranları yalnızca yeniden sınıflandırılır.
+    st.sidebar.header("3. Eşik Ayarları")
+    target_val = st.sidebar.slider("Hedef Başarı (%)", min_value=0, max_value=100, value=90)
+    min_val = st.sidebar.slider("Alt Sınır (%)", min_value=0, max_value=100, value=70)
+
+    st.sidebar.header("4. Grafik Ayarları")
+    chart_mode = st.sidebar.selectbox("Birim Grafiği", charts.CHART_MODES,
+                                      help="Otomatik: çubuk sayısı sınırı aşarsa ASM bazında ya da en iyi/en düşük birimler ve dağılım gösterilir.")
+    max_bars = int(st.sidebar.number_input("En Fazla Çubuk", min_value=5, value=charts.MAX_BARS, step=5))
+
     # -----------------------------------------------------------------------------
     # 5. ANALİZ
     # -----------------------------------------------------------------------------
     if submit_button:
         with st.spinner('Analiz yapılıyor...'):
-            temp_df = df.copy()
-            if selected_ilce != "Tümü": temp_df = temp_df[temp_df['ilce'] == selected_ilce]
-            if selected_asm != "Tümü": temp_df = temp_df[temp_df['asm'] == selected_asm]
-            if selected_asilar: temp_df = temp_df[temp_df['asi'].isin(selected_asilar)] # AŞI FİLTRESİ
-            if selected_doses: temp_df = temp_df[temp_df['doz'].isin(selected_doses)]
-            
-            if isinstance(date_range, list) and len(date_range) == 2:
-                mask = (temp_df['hedef_tarih'].dt.date >= date_range[0]) & (temp_df['hedef_tarih'].dt.date <= date_range[1])
-                temp_df = temp_df[mask]
-            
-            temp_df['basari_durumu'] = temp_df['yapilan_tarih'].notna().astype(int)
+            # st.date_input iki tarihi tuple olarak döndürür.
+            if not (isinstance(date_range, (list, tuple)) and len(date_range) == 2): date_range = None
+            filter_params = {
+                "ilce": selected_ilce, "asm": selected_asm, "asilar": selected_asilar,
+                "dozlar": selected_doses, "date_range": date_range
+            }
             
             date_str = "Tumu"
-            if isinstance(date_range, list) and len(date_range) == 2:
+            if date_range is not None:
                 date_str = f"{date_range[0].strftime('%d.%m.%Y')} - {date_range[1].strftime('%d.%m.%Y')}"
             
             asi_str = ", ".join(map(str, selected_asilar)) if selected_asilar else "Tümü"
             dose_str = ", ".join(map(str, selected_doses)) if selected_doses else ""
             
-            st.session_state.filtered_df = temp_df
+            st.session_state.filter_result = filter_results(cube, filter_params, timer)
+            st.session_state.filter_params = filter_params
             st.session_state.filter_info = f"{selected_ilce} / {selected_asm} | Aşı: {asi_str}"
-            st.session_state.target_val = target_val
-            st.session_state.min_val = min_val
             
             st.session_state.report_meta = {
                 "tarih_araligi": date_str, "ilce": selected_ilce, "asm": selected_asm,
-                "asi": asi_str, "doz": dose_str, "hedef": target_val, "alt_sinir": min_val
+                "asi": asi_str, "doz": dose_str
             }
             st.session_state.has_run = True
 
@@ -373,40 +501,29 @@ if uploaded_files:
     # 6. SONUÇ EKRANI
     # -----------------------------------------------------------------------------
     if st.session_state.has_run:
-        df_res = st.session_state.filtered_df
-        t_val = st.session_state.target_val
-        m_val = st.session_state.min_val
-        meta = st.session_state.report_meta
+        res = st.session_state.filter_result
+        t_val, m_val = target_val, min_val
+        meta = dict(st.session_state.report_meta, hedef=t_val, alt_sinir=m_val)
         
-        if df_res.empty:
+        if res['rates'] is None:
             st.warning("⚠️ Seçilen kriterlere uygun veri bulunamadı.")
         else:
-            total_target = len(df_res)
-            total_done = df_res['basari_durumu'].sum()
-            genel_oran = (total_done / total_target * 100) if total_target > 0 else 0
+            # Eşik değişiminde yalnızca bu adım çalışır: sıralı oranlar üzerinde ikili arama.
+            rates = res['rates']
+            with timer.stage("Eşik sınıflandırma", len(rates.ozet)) as rec:
+                tables = rates.tables(t_val, m_val)
+                unit_status = rates.status(t_val, m_val)
+                rec['rows_out'] = len(tables['riskli_asm'])
+            total_target, total_done = tables['hedef'], tables['yapilan']
+            genel_oran = tables['genel_oran']
             
-            ozet = df_res.groupby(['ilce', 'asm', 'birim']).agg(
-                toplam=('basari_durumu', 'count'), yapilan=('basari_durumu', 'sum')
-            ).reset_index()
-            ozet['oran'] = (ozet['yapilan'] / ozet['toplam'] * 100).round(2)
+            ozet = tables['ozet']
             
-            dusuk_oranli_sayisi = len(ozet[ozet['oran'] < m_val])
+            dusuk_oranli_sayisi = len(tables['acil'])
             meta['genel_basari_orani'] = genel_oran
             meta['dusuk_birim_sayisi'] = dusuk_oranli_sayisi
-            st.session_state.report_meta = meta 
             
-            riskli_asm_listesi = []
-            for (ilce, asm), grup in ozet.groupby(['ilce', 'asm']):
-                kirmizi = len(grup[grup['oran'] < m_val])
-                if kirmizi > 0:
-                    yesil = len(grup[grup['oran'] >= t_val])
-                    sari = len(grup) - kirmizi - yesil
-                    riskli_asm_listesi.append({
-                        "İlçe": ilce, "ASM Adı": asm, 
-                        "Acil Müdahale": kirmizi, "Geliştirilmeli": sari, "Başarılı": yesil,        
-                        "Toplam Birim": len(grup)
-                    })
-            riskli_asm_sayisi = len(riskli_asm_listesi)
+            riskli_asm_sayisi = len(tables['riskli_asm'])
             
             if meta['ilce'] != "Tümü":
                 ana_baslik = f"{meta['ilce']} - BAŞARI ORANI"
@@ -430,97 +547,120 @@ if uploaded_files:
             st.markdown("---")
 
             g1, g2 = st.columns(2)
-            if st.session_state.filter_info.startswith("Tümü"):
-                group_col = 'ilce'
-                x_label = "İlçe"
-                chart_height = 500
-            else:
-                group_col = 'birim'
-                x_label = "Aile Hekimliği Birimi (AHB)"
-                chart_height = 600
-                
-            chart_data = df_res.groupby(group_col).agg(toplam=('basari_durumu','count'), yapilan=('basari_durumu','sum')).reset_index()
-            if not chart_data.empty:
-                chart_data['oran'] = (chart_data['yapilan'] / chart_data['toplam'] * 100).round(2)
-                chart_data = chart_data.sort_values(by='oran', ascending=False)
-                
-                def get_chart_status(x):
-                    if x >= t_val: return 'Başarılı'
-                    elif x >= m_val: return 'Geliştirilmeli'
-                    else: return 'Acil Müdahale'
-
-                chart_data['Durum'] = chart_data['oran'].apply(get_chart_status)
-                
-                fig_bar = px.bar(chart_data, x=group_col, y='oran', color='Durum', 
-                                 color_discrete_map={'Başarılı':'#0d6efd', 'Geliştirilmeli':'#ffc107', 'Acil Müdahale':'#dc3545'},
-                                 text='oran', title=f"Performans Dağılımı ({x_label})", height=chart_height)
-                
-                fig_bar.update_layout(xaxis_title=x_label, yaxis_title="Başarı Oranı (%)")
-                fig_bar.update_traces(textposition='outside')
-                g1.plotly_chart(fig_bar, use_container_width=True)
-
-            trend = df_res.copy()
-            trend['AY'] = trend['hedef_tarih'].dt.strftime('%Y-%m')
-            trend_data = trend.groupby('AY').agg({'basari_durumu':['sum','count']}).reset_index()
-            trend_data.columns = ['AY', 'YAPILAN', 'HEDEF']
-            trend_data['ORAN'] = (trend_data['YAPILAN'] / trend_data['HEDEF'] * 100).round(2)
-            fig_line = px.line(trend_data, x='AY', y='ORAN', title="Zaman Serisi Trendi", markers=True)
+            if not res['chart_data'].empty:
+                shown_mode, figures = chart_figures(res, chart_mode, t_val, m_val, max_bars, timer)
+                for fig in figures:
+                    g1.plotly_chart(fig, use_container_width=True)
+                if chart_mode == charts.MODE_AUTO and shown_mode != charts.MODE_ALL:
+                    g1.caption(f"{len(res['chart_data'])} birim {max_bars} çubuk sınırını aştığı için '{shown_mode}' görünümü gösteriliyor.")
+
+            trend = trend_engine(res, cube, timer)
+            t1, t2 = g2.columns(2)
+            trend_freq = t1.selectbox("Dönem", list(analysis.TREND_FREQS), index=1,
+                                      format_func=analysis.TREND_FREQS.get, key='trend_donem')
+            seri_secenekleri = {"Toplam": None, "Aşı": 'asi', "Doz": 'doz'}
+            seri_secenekleri = {k: v for k, v in seri_secenekleri.items() if v is None or v in trend.series_source}
+            trend_by = seri_secenekleri[t2.selectbox("Karşılaştır", list(seri_secenekleri), key='trend_seri')]
+            with timer.stage("Trend serisi", len(trend.days)) as rec:
+                trend_data = trend.trend(trend_freq, trend_by)
+                rec['rows_out'] = len(trend_data)
+            secili_seriler = None
+            if trend_by is not None:
+                # Varsayılan olarak hedefi en büyük beş seri gösterilir.
+                seri_hedef = trend_data.groupby('SERI', sort=False)['HEDEF'].sum().sort_values(ascending=False, kind='stable')
+                secenekler = list(seri_hedef.index)
+                # Seçim filtre değişikliklerinden sonra da saklanır; yeni seçeneklerde olmayan seriler
+                # atılır, hiçbiri kalmazsa (ya da seçim boşaltılmışsa) varsayılana dönülür.
+                seri_key = f'trend_seriler_{trend_by}'
+                gecerli = [s for s in st.session_state.get(seri_key) or [] if s in secenekler]
+                st.session_state[seri_key] = gecerli or secenekler[:5]
+                secili_seriler = g2.multiselect("Seriler", secenekler, key=seri_key)
+            with timer.stage("Plotly trend grafiği", len(trend_data)):
+                fig_line = charts.trend_figure(trend_data, series=secili_seriler)
             g2.plotly_chart(fig_line, use_container_width=True)
 
             st.subheader("📋 Detaylı Raporlar")
+            # Raporlar her yeniden çalıştırmada değil, yalnızca indirilirken üretilir.
+            exports = export_cache(meta)
+            pdf_meta = dict(meta)
+            # Kayıt düzeyi detay çok büyük olabileceği için önbelleğe alınmaz; kayıtlar kopyalanmadan
+            # konumlardan parça parça yazılır.
+            filter_params = dict(st.session_state.filter_params)
+            st.download_button(
+                "📥 Kayıt Düzeyi Detay (Excel)",
+                data=timed_export(timer, 'kayit_duzeyi_detay.xlsx', lambda: to_excel(df, analysis.filter_positions(df, **filter_params))),
+                file_name='kayit_duzeyi_detay.xlsx', key='detay_xls', on_click="ignore"
+            )
+            # Birim tablolarının arama metni filtre seti başına bir kez üretilir.
+            if 'search' not in res:
+                res['search'] = analysis.search_text(ozet, ['ilce', 'asm', 'birim'])
+            search = res['search']
             tab1, tab2, tab3, tab4 = st.tabs(["📊 Birim Performans", "🚦 Birim Başarı Durumu", "⚠️ Acil Müdahale Gerekenler", "🚨 Riskli ASM Listesi"])
 
             with tab1:
-                ozet_num = ozet.copy()
+                ozet_num = ozet
                 if 'Durum' in ozet_num.columns: ozet_num = ozet_num.drop(columns=['Durum'])
                 c_d1, c_d2 = st.columns([1,1])
-                c_d1.download_button("📥 Excel İndir", data=to_excel(ozet_num), file_name='birim_perf_sayisal.xlsx')
-                c_d2.download_button("📄 PDF İndir", data=create_pdf(ozet_num, "Birim Performans (Sayisal)", meta), file_name='birim_perf_sayisal.pdf')
-                st.dataframe(ozet_num, column_config={"oran": st.column_config.ProgressColumn("Başarı Oranı", format="%.2f%%", min_value=0, max_value=100)}, use_container_width=True, hide_index=True)
+                c_d1.download_button("📥 Excel İndir", data=lazy_export(exports, 'birim_perf.xlsx', lambda: to_excel(ozet_num), timer, len(ozet_num)), file_name='birim_perf_sayisal.xlsx', on_click="ignore")
+                c_d2.download_button("📄 PDF İndir", data=lazy_export(exports, 'birim_perf.pdf', lambda: create_pdf(ozet_num, "Birim Performans (Sayisal)", pdf_meta), timer, len(ozet_num)), file_name='birim_perf_sayisal.pdf', on_click="ignore")
+                paged_table(ozet_num, 'tablo_perf', search=search, column_config={"oran": st.column_config.ProgressColumn("Başarı Oranı", format="%.2f%%", min_value=0, max_value=100)})
 
             with tab2:
-                def get_status_text(rate, target, minimum):
-                    if rate >= target: return "Başarılı"
-                    elif rate >= minimum: return "Geliştirilmeli"
-                    else: return "Acil Müdahale"
-                
-                ozet_status = ozet.copy()
-                ozet_status['Başarı Durumu'] = ozet_status['oran'].apply(lambda x: get_status_text(x, t_val, m_val))
-                cols_to_keep = ['ilce', 'asm', 'birim', 'Başarı Durumu']
-                ozet_status_final = ozet_status[cols_to_keep]
-                
-                def color_status(val):
-                    if val == "Başarılı": return 'background-color: #cfe2ff; color: #084298'
-                    elif val == "Geliştirilmeli": return 'background-color: #fff3cd; color: #856404'
-                    elif val == "Acil Müdahale": return 'background-color: #f8d7da; color: #721c24'
-                    return ''
+                ozet_status_final = ozet[['ilce', 'asm', 'birim']].assign(
+                    **{'Başarı Durumu': unit_status}
+                )
 
                 c_d1, c_d2 = st.columns([1,1])
-                c_d1.download_button("📥 Excel İndir", data=to_excel(ozet_status_final), file_name='birim_basari_durumu.xlsx', key='bd_xls')
+                c_d1.download_button("📥 Excel İndir", data=lazy_export(exports, 'birim_basari_durumu.xlsx', lambda: to_excel(ozet_status_final), timer, len(ozet_status_final)), file_name='birim_basari_durumu.xlsx', key='bd_xls', on_click="ignore")
                 
-                meta_status = meta.copy()
+                meta_status = pdf_meta.copy()
                 meta_status['sadece_sayi_goster'] = True
-                c_d2.download_button("📄 PDF İndir", data=create_pdf(ozet_status_final, "Birim Basari Durumu", meta_status), file_name='birim_basari_durumu.pdf', key='bd_pdf')
-                st.dataframe(ozet_status_final.style.map(color_status, subset=['Başarı Durumu']), use_container_width=True, hide_index=True)
+                c_d2.download_button("📄 PDF İndir", data=lazy_export(exports, 'birim_basari_durumu.pdf', lambda: create_pdf(ozet_status_final, "Birim Basari Durumu", meta_status), timer, len(ozet_status_final)), file_name='birim_basari_durumu.pdf', key='bd_pdf', on_click="ignore")
+                paged_table(ozet_status_final, 'tablo_durum', search=search,
+                            style=lambda page: page.style.apply(status_styles, subset=['Başarı Durumu']))
 
             with tab3:
-                low = ozet[ozet['oran'] < m_val].sort_values(by='oran')
+                low = tables['acil']
                 c_d1, c_d2 = st.columns([1,1])
-                c_d1.download_button("📥 Excel İndir", data=to_excel(low), file_name='acil_mudahale_birimler.xlsx', key='dl1')
-                c_d2.download_button("📄 PDF İndir", data=create_pdf(low, "Acil Mudahale Gereken Birimler", meta), file_name='acil_mudahale_birimler.pdf', key='dp1')
-                st.dataframe(low, column_config={"oran": st.column_config.NumberColumn("Başarı", format="%.2f%%")}, use_container_width=True, hide_index=True)
+                c_d1.download_button("📥 Excel İndir", data=lazy_export(exports, 'acil_mudahale.xlsx', lambda: to_excel(low), timer, len(low)), file_name='acil_mudahale_birimler.xlsx', key='dl1', on_click="ignore")
+                c_d2.download_button("📄 PDF İndir", data=lazy_export(exports, 'acil_mudahale.pdf', lambda: create_pdf(low, "Acil Mudahale Gereken Birimler", pdf_meta), timer, len(low)), file_name='acil_mudahale_birimler.pdf', key='dp1', on_click="ignore")
+                paged_table(low, 'tablo_acil', search=search, column_config={"oran": st.column_config.NumberColumn("Başarı", format="%.2f%%")})
 
             with tab4:
-                rdf = pd.DataFrame(riskli_asm_listesi)
+                rdf = tables['riskli_asm']
                 if not rdf.empty:
-                    rdf = rdf.sort_values(by="Acil Müdahale", ascending=False)
                     c_d1, c_d2 = st.columns([1,1])
-                    c_d1.download_button("📥 Excel İndir", data=to_excel(rdf), file_name='riskli_asm_ozet.xlsx', key='dl2')
-                    c_d2.download_button("📄 PDF İndir", data=create_pdf(rdf, "Riskli ASM Ozet Listesi", meta), file_name='riskli_asm_ozet.pdf', key='dp2')
-                    st.dataframe(rdf, use_container_width=True, hide_index=True)
+                    c_d1.download_button("📥 Excel İndir", data=lazy_export(exports, 'riskli_asm.xlsx', lambda: to_excel(rdf), timer, len(rdf)), file_name='riskli_asm_ozet.xlsx', key='dl2', on_click="ignore")
+                    c_d2.download_button("📄 PDF İndir", data=lazy_export(exports, 'riskli_asm.pdf', lambda: create_pdf(rdf, "Riskli ASM Ozet Listesi", pdf_meta), timer, len(rdf)), file_name='riskli_asm_ozet.pdf', key='dp2', on_click="ignore")
+                    paged_table(rdf, 'tablo_riskli')
                 else:
                     st.success("Tebrikler! Riskli ASM bulunamadı.")
     else:
         st.info("👈 Analizi başlatmak için soldaki menüden **'Filtreleri Uygula'** butonuna basınız.")
+
+    st.sidebar.markdown("---")
+    paylasilan = get_dataset_registry().stats()
+    st.sidebar.caption(
+        f"💾 Oturum belleği: {session_memory_mb():.1f} MB | "
+        f"Paylaşılan veri: {paylasilan['nbytes'] / (1024 * 1024):.1f} MB "
+        f"({paylasilan['datasets']} küme, {paylasilan['handles']} referans)"
+    )
 else:
     st.info("⬅️ Lütfen sol menüden Excel dosyanızı(veya dosyalarınızı) yükleyerek başlayın.")
+
+# -----------------------------------------------------------------------------
+# 7. PERFORMANS PANELİ (?perf=1 ya da ASI_PERF=1)
+# -----------------------------------------------------------------------------
+if timer is not perf.NULL:
+    with st.sidebar.expander("⏱️ Performans", expanded=False):
+        kayitlar = timer.snapshot()
+        if kayitlar:
+            perf_df = pd.DataFrame(kayitlar[::-1])
+            sutunlar = [c for c in ['run', 'stage', 'file', 'seconds', 'rows_in', 'rows_out', 'mem_delta_mb'] if c in perf_df.columns]
+            st.dataframe(perf_df[sutunlar], hide_index=True, use_container_width=True, column_config={
+                "run": "Çalıştırma", "stage": "Adım", "file": "Dosya", "seconds": st.column_config.NumberColumn("Süre (sn)", format="%.3f"),
+                "rows_in": "Giriş satırı", "rows_out": "Çıkış satırı", "mem_delta_mb": "Bellek Δ (MB)",
+            })
+        else:
+            st.caption("Henüz ölçüm yok.")
+        if perf.PERF_LOG: st.caption(f"Günlük: {perf.PERF_LOG}")
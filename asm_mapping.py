@@ -0,0 +1,272 @@
+"""Birim adlarından ASM eşleştirmesi için yardımcı fonksiyonlar."""
+
+import hashlib
+import json
+import os
+import re
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+# -----------------------------------------------------------------------------
+# ASM EŞLEŞTİRME YARDIMCILARI
+# -----------------------------------------------------------------------------
+
+def clean_turkish_chars(text):
+    """Türkçe karakterleri İngilizce karşılıklarına çevirir ve büyütür."""
+    if not isinstance(text, str): return str(text)
+    text = text.replace("İ", "I").replace("ı", "I")
+    text = text.replace("Ş", "S").replace("ş", "s")
+    text = text.replace("Ğ", "G").replace("ğ", "g")
+    text = text.replace("Ü", "U").replace("ü", "u")
+    text = text.replace("Ö", "O").replace("ö", "o")
+    text = text.replace("Ç", "C").replace("ç", "c")
+    return text.upper()
+
+# clean_turkish_chars ile aynı dönüşümler; str.translate ile tek geçişte uygulanır.
+TURKISH_TRANSLATION = str.maketrans({
+    "İ": "I", "ı": "I", "Ş": "S", "ş": "s", "Ğ": "G", "ğ": "g",
+    "Ü": "U", "ü": "u", "Ö": "O", "ö": "o", "Ç": "C", "ç": "c",
+})
+
+def extract_key_from_unit_name(text):
+    """Birim adından ortak bir anahtar (KADIKOY-5) üretir."""
+    text = clean_turkish_chars(text)
+    text = re.sub(r'^ISTANBUL\s+', '', text)
+    match = re.search(r'(\d+)\s*NOLU', text)
+    if match:
+        number = int(match.group(1)) 
+        district_part = text[:match.start()].strip()
+        return f"{district_part}-{number}"
+    return None
+
+# Aranan ASM listesi dosyaları (öncelik sırasıyla, çalışma dizininde).
+ASM_FILES = ["ASM.xlsx", "ASM.csv", "ASM.xlsx - Sayfa1.csv", "asm_listesi.xlsx"]
+# Derlenmiş eşleştirme indeksinin dizini (ASI_ASM_INDEX_DIR).
+INDEX_DIR = os.environ.get(
+    "ASI_ASM_INDEX_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "asm_index"),
+)
+# İndeks biçimi değiştiğinde artırılır; eski indeksler yeniden derlenir.
+INDEX_VERSION = 1
+
+def find_asm_file():
+    """Çalışma dizinindeki ilk ASM listesi dosyasının yolunu döndürür."""
+    return next((f for f in ASM_FILES if os.path.exists(f)), None)
+
+def read_asm_source(path):
+    """ASM listesi dosyasını okur ve anahtar -> ASM adı sözlüğünü hazırlar; okunamazsa None."""
+    try:
+        if path.endswith('.xlsx'):
+            df_asm = pd.read_excel(path)
+        else:
+            df_asm = pd.read_csv(path)
+    except:
+        return None
+
+    df_asm.columns = [c.strip() for c in df_asm.columns]
+    col_birim = next((c for c in df_asm.columns if 'birim' in c.lower() and 'ad' in c.lower()), None)
+    col_asm = next((c for c in df_asm.columns if 'aile' in c.lower() and 'merkez' in c.lower()), None)
+    
+    if not col_birim or not col_asm:
+        return None
+        
+    keys = extract_keys(df_asm[col_birim])
+    asm_names = df_asm[col_asm].map(lambda x: str(x).strip()).to_numpy(dtype=object)
+    has_key = pd.notna(keys)
+    # Aynı anahtar birden çok kez geçerse (iterrows'taki gibi) son satır geçerli olur.
+    return dict(zip(keys[has_key], asm_names[has_key]))
+
+def fingerprint_pairs(keys, values):
+    """Sıralı anahtar/değer çiftlerinin kısa özeti (önbellek anahtarı için)."""
+    h = hashlib.sha256()
+    for key, value in zip(keys, values):
+        h.update(f"{key}\t{value}\n".encode('utf-8'))
+    return h.hexdigest()[:16]
+
+# -----------------------------------------------------------------------------
+# DERLENMİŞ EŞLEŞTİRME İNDEKSİ
+# -----------------------------------------------------------------------------
+
+class AsmIndex(Mapping):
+    """Sıralı anahtar dizisi + ASM kod dizisi; diskten bellek eşlemiyle (mmap) açılır.
+
+    Sözlük gibi kullanılabilir; toplu eşleştirme lookup() ile ikili aramayla yapılır.
+    """
+
+    def __init__(self, keys, codes, names, fingerprint, paths=None):
+        self.sorted_keys = keys
+        self.asm_codes = codes
+        self.asm_names = names
+        self.fingerprint = fingerprint
+        self.paths = paths
+
+    def __reduce__(self):
+        # İşçi süreçlere diziler yerine dosya yolları gönderilir; orada yeniden eşlenir.
+        if self.paths:
+            return (open_index, (self.paths,))
+        return (AsmIndex, (self.sorted_keys, self.asm_codes, self.asm_names, self.fingerprint))
+
+    def positions(self, keys):
+        """Anahtarların sıralı dizideki konumları; bulunamayanlar için -1."""
+        query = np.asarray([k if isinstance(k, str) else '' for k in keys], dtype=str)
+        if len(self.sorted_keys) == 0 or len(query) == 0:
+            return np.full(len(query), -1, dtype=np.int64)
+        pos = np.searchsorted(self.sorted_keys, query)
+        pos_c = np.minimum(pos, len(self.sorted_keys) - 1)
+        found = (pos < len(self.sorted_keys)) & (self.sorted_keys[pos_c] == query) & (query != '')
+        return np.where(found, pos_c, -1)
+
+    def lookup(self, keys):
+        """Anahtar dizisini ASM adlarına eşler; bulunamayanlar None olur."""
+        pos = self.positions(keys)
+        names = np.asarray(self.asm_names, dtype=object)
+        out = np.full(len(pos), None, dtype=object)
+        hit = pos >= 0
+        out[hit] = names[np.asarray(self.asm_codes)[pos[hit]]]
+        return out
+
+    def __getitem__(self, key):
+        pos = self.positions([key])[0]
+        if pos < 0:
+            raise KeyError(key)
+        return str(self.asm_names[self.asm_codes[pos]])
+
+    def __iter__(self):
+        return (str(k) for k in self.sorted_keys)
+
+    def __len__(self):
+        return len(self.sorted_keys)
+
+def _index_paths(source):
+    """Kaynak dosyanın yolu, boyutu ve değişiklik zamanından türetilen indeks dosya yolları."""
+    st = os.stat(source)
+    ident = f"{INDEX_VERSION}|{os.path.abspath(source)}|{st.st_size}|{st.st_mtime_ns}"
+    base = os.path.join(INDEX_DIR, hashlib.sha256(ident.encode('utf-8')).hexdigest()[:16])
+    return {part: f"{base}.{part}.npy" for part in ('keys', 'codes', 'names')} | {'meta': f"{base}.json"}
+
+def open_index(paths):
+    """Derlenmiş indeksi bellek eşlemiyle açar; eksik ya da bozuksa None."""
+    try:
+        with open(paths['meta'], encoding='utf-8') as f:
+            meta = json.load(f)
+        arrays = {part: np.load(paths[part], mmap_mode='r') for part in ('keys', 'codes', 'names')}
+    except (OSError, ValueError):
+        return None
+    return AsmIndex(arrays['keys'], arrays['codes'], arrays['names'], meta['fingerprint'], paths)
+
+def compile_index(source, paths):
+    """ASM listesini sıralı anahtar/kod dizilerine derler ve diske yazar; sözlük okunamazsa None."""
+    mapping = read_asm_source(source)
+    if mapping is None:
+        return None
+    keys = sorted(mapping)
+    values = [mapping[k] for k in keys]
+    names, codes = np.unique(np.asarray(values, dtype=str), return_inverse=True) if values else (np.array([], dtype=str), np.array([], dtype=np.int32))
+    arrays = {
+        'keys': np.asarray(keys, dtype=str),
+        'codes': codes.astype(np.int32),
+        'names': names,
+    }
+    meta = {'source': os.path.abspath(source), 'fingerprint': fingerprint_pairs(keys, values), 'count': len(keys)}
+    try:
+        os.makedirs(INDEX_DIR, exist_ok=True)
+        # Dosyalar geçici adla yazılıp yerine taşınır; meta dosyası en son yazılır.
+        for part, arr in arrays.items():
+            tmp = f"{paths[part]}.{os.getpid()}.tmp"
+            with open(tmp, 'wb') as f:
+                np.save(f, arr)
+            os.replace(tmp, paths[part])
+        tmp = f"{paths['meta']}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, paths['meta'])
+    except OSError:
+        # Diske yazılamıyorsa indeks yalnızca bellekte kullanılır.
+        return AsmIndex(arrays['keys'], arrays['codes'], arrays['names'], meta['fingerprint'])
+    _remove_stale_indexes(meta['source'], paths['meta'])
+    return open_index(paths)
+
+def _remove_stale_indexes(source, keep_meta):
+    """Aynı kaynak dosyanın eski sürümlerinden derlenmiş indeksleri siler."""
+    for name in os.listdir(INDEX_DIR):
+        path = os.path.join(INDEX_DIR, name)
+        if not name.endswith('.json') or path == keep_meta:
+            continue
+        try:
+            with open(path, encoding='utf-8') as f:
+                if json.load(f).get('source') != source:
+                    continue
+            base = path[:-len('.json')]
+            for part in ('keys', 'codes', 'names'):
+                if os.path.exists(f"{base}.{part}.npy"): os.remove(f"{base}.{part}.npy")
+            os.remove(path)
+        except (OSError, ValueError):
+            continue
+
+_loaded = {}
+
+def load_asm_mapping():
+    """Dizindeki ASM dosyasını arar ve derlenmiş eşleştirme indeksini döndürür.
+
+    Kaynak dosya değiştiğinde (boyut/değişiklik zamanı) indeks kendiliğinden yeniden derlenir;
+    değişmediyse süreç içinde açılmış indeks ya da diskteki derlenmiş hâli kullanılır.
+    """
+    source = find_asm_file()
+    if source is None:
+        return None
+    try:
+        paths = _index_paths(source)
+    except OSError:
+        return None
+    if _loaded.get('meta') == paths['meta']:
+        return _loaded['index']
+    index = open_index(paths) or compile_index(source, paths)
+    if index is not None:
+        _loaded.update(meta=paths['meta'], index=index)
+    return index
+
+def extract_keys(values):
+    """Birim adı dizisinden anahtarları vektörel üretir (extract_key_from_unit_name ile aynı sonuç).
+
+    Her farklı birim adı yalnızca bir kez işlenir; sonuç kodlar üzerinden satırlara geri dağıtılır.
+    Anahtar üretilemeyen satırlar için None döner.
+    """
+    codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=False)
+    # str() ile aynı davranış için nesne tipinde tutulur (pyarrow regex motoru \d'yi farklı yorumlar).
+    names = pd.Series([str(v) for v in uniques], dtype=object)
+    cleaned = names.str.translate(TURKISH_TRANSLATION).str.upper()
+    cleaned = cleaned.str.replace(r'^ISTANBUL\s+', '', regex=True)
+    parts = cleaned.str.extract(r'(?s)^(.*?)(\d+)\s*NOLU')
+
+    matched = parts[1].notna().to_numpy()
+    unique_keys = np.full(len(names), None, dtype=object)
+    if matched.any():
+        numbers = parts.loc[matched, 1].map(lambda d: str(int(d)))
+        unique_keys[matched] = (parts.loc[matched, 0].str.strip() + "-" + numbers).to_numpy(dtype=object)
+    return unique_keys[codes]
+
+def map_units_to_asm(values, asm_map):
+    """Birim adlarını ASM adlarına eşler; eşleşmeyenler NaN olur."""
+    codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=False)
+    unique_keys = extract_keys(uniques)
+    if isinstance(asm_map, AsmIndex):
+        unique_asm = asm_map.lookup(unique_keys)
+    else:
+        unique_asm = pd.Series(unique_keys, dtype=object).map(asm_map).to_numpy(dtype=object)
+    return pd.Series(unique_asm[codes], index=getattr(values, 'index', None), dtype=object)
+
+def unmatched_units(units, counts):
+    """ASM'si bulunamayan birimleri anahtarları ve kayıt sayılarıyla listeler (eşleştirme boşlukları).
+
+    units: ASM'si "Belirtilmemiş" kalan kayıtların birim adları, counts: her satırın kayıt sayısı.
+    """
+    table = pd.Series(np.asarray(counts), index=pd.Index(np.asarray(units, dtype=object), name='birim'))
+    table = table.groupby(level=0).sum().sort_values(ascending=False, kind='stable')
+    return pd.DataFrame({
+        'birim': table.index.to_numpy(dtype=object),
+        'anahtar': extract_keys(table.index.to_numpy(dtype=object)),
+        'kayit_sayisi': table.to_numpy(dtype='int64'),
+    })
+
@@ -0,0 +1,203 @@
+"""Toplu rapor aracı: panelin ilçe bazlı PDF/Excel raporlarını tüm ilçeler için tek komutla üretir.
+
+Kullanım:
+    python batch_report.py veri1.xlsx veri2.csv --cikti raporlar --hedef 90 --alt-sinir 70 \
+        --baslangic 2024-01-01 --bitis 2024-06-30
+
+Her ilçe için <cikti>/<ilçe>/ klasörüne birim performans, acil müdahale ve riskli ASM
+raporları yazılır; il geneli raporlar <cikti>/IL_GENEL/ altına konur.
+"""
+
+import argparse
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import analysis
+import asm_mapping
+import ingest
+from reports import create_pdf, write_excel
+
+# Panelde sonuç sekmelerindeki indirme düğmeleriyle aynı dosya adları ve başlıklar.
+REPORTS = [
+    ('ozet', 'birim_perf_sayisal', "Birim Performans (Sayisal)"),
+    ('acil', 'acil_mudahale_birimler', "Acil Mudahale Gereken Birimler"),
+    ('riskli_asm', 'riskli_asm_ozet', "Riskli ASM Ozet Listesi"),
+]
+PROVINCE_DIR = "IL_GENEL"
+
+# -----------------------------------------------------------------------------
+# 1. VERİ OKUMA
+# -----------------------------------------------------------------------------
+
+def load_inputs(paths, workers=None):
+    """Dosyaları panelle aynı normalizasyonla okur; (birleşik df, dosya -> hata) döndürür."""
+    files = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            files.append((path, os.path.basename(path), f.read()))
+    frames, errors = ingest.load_files(files, asm_mapping.load_asm_mapping(), workers=workers)
+    parts = [frames[path] for path in paths if path in frames]
+    if not parts:
+        return None, errors
+    return (ingest.concat_compact(parts) if len(parts) > 1 else parts[0]), errors
+
+# -----------------------------------------------------------------------------
+# 2. ANALİZ
+# -----------------------------------------------------------------------------
+
+def report_meta(ilce, tables, date_range, asilar, dozlar, target, minimum):
+    """PDF başlığında kullanılan filtre bilgisini panelin report_meta sözlüğüyle aynı biçimde kurar."""
+    date_str = "Tumu"
+    if date_range is not None:
+        date_str = f"{date_range[0].strftime('%d.%m.%Y')} - {date_range[1].strftime('%d.%m.%Y')}"
+    return {
+        "tarih_araligi": date_str, "ilce": ilce, "asm": "Tümü",
+        "asi": ", ".join(map(str, asilar)) if asilar else "Tümü",
+        "doz": ", ".join(map(str, dozlar)) if dozlar else "",
+        "hedef": target, "alt_sinir": minimum,
+        "genel_basari_orani": tables['genel_oran'],
+        "dusuk_birim_sayisi": len(tables['acil']),
+    }
+
+def build_jobs(df, target, minimum, asilar=None, dozlar=None, date_range=None, cube=None):
+    """Filtreyi bir kez uygular, tüm ilçelerin tablolarını tek geçişte hesaplar; iş listesini döndürür.
+
+    Küp önceden kurulduysa (ör. sürüm yayınlanırken) cube ile verilir; df'den yeniden kurulmaz.
+    """
+    if cube is None:
+        cube = analysis.build_cube(df)
+    if date_range is None and not cube.empty:
+        # Panelde tarih seçici varsayılan olarak verinin tamamını kapsar.
+        date_range = (cube['gun'].min(), cube['gun'].max())
+    cube_res = analysis.filter_cube(cube, asilar=asilar, dozlar=dozlar, date_range=date_range)
+    if cube_res.empty:
+        return []
+
+    jobs = []
+    province = analysis.report_tables(cube_res, target, minimum)
+    jobs.append((PROVINCE_DIR, province, report_meta("Tümü", province, date_range, asilar, dozlar, target, minimum)))
+    for ilce, tables in analysis.district_report_tables(cube_res, target, minimum).items():
+        jobs.append((ilce, tables, report_meta(ilce, tables, date_range, asilar, dozlar, target, minimum)))
+    return jobs
+
+# -----------------------------------------------------------------------------
+# 3. RAPOR ÜRETİMİ (SÜREÇ HAVUZU)
+# -----------------------------------------------------------------------------
+
+def safe_dirname(name):
+    """İlçe adını klasör adı olarak kullanılabilir hâle getirir."""
+    return re.sub(r'[^\w\-]+', '_', str(name)).strip('_') or "BILINMEYEN"
+
+def render_reports(name, tables, meta, out_dir, formats=('pdf', 'xlsx')):
+    """Bir ilçenin raporlarını yazar; yazılan dosya yollarını döndürür (işçi süreçte çalışır)."""
+    target_dir = os.path.join(out_dir, safe_dirname(name))
+    os.makedirs(target_dir, exist_ok=True)
+    written = []
+    for key, file_name, title in REPORTS:
+        table = tables[key]
+        # Panel riskli ASM yoksa rapor sunmaz; aynı davranış korunur.
+        if key == 'riskli_asm' and table.empty: continue
+        if 'xlsx' in formats:
+            path = os.path.join(target_dir, f"{file_name}.xlsx")
+            write_excel(table, path)
+            written.append(path)
+        if 'pdf' in formats:
+            path = os.path.join(target_dir, f"{file_name}.pdf")
+            with open(path, 'wb') as f:
+                f.write(create_pdf(table, title, meta))
+            written.append(path)
+    return written
+
+def render_all(jobs, out_dir, formats=('pdf', 'xlsx'), workers=None, on_done=None):
+    """İlçe raporlarını paralel üretir; (ilçe -> dosyalar, ilçe -> hata) döndürür."""
+    workers = ingest.INGEST_WORKERS if workers is None else workers
+    written, errors = {}, {}
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = {executor.submit(render_reports, name, tables, meta, out_dir, formats): name for name, tables, meta in jobs}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    written[name] = future.result()
+                except Exception as e:
+                    errors[name] = str(e)
+                if on_done: on_done(name)
+        return written, errors
+
+    for name, tables, meta in jobs:
+        try:
+            written[name] = render_reports(name, tables, meta, out_dir, formats)
+        except Exception as e:
+            errors[name] = str(e)
+        if on_done: on_done(name)
+    return written, errors
+
+# -----------------------------------------------------------------------------
+# 4. KOMUT SATIRI
+# -----------------------------------------------------------------------------
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Tüm ilçeler için aşı performans raporlarını toplu üretir.")
+    parser.add_argument('dosyalar', nargs='+', help="Excel/CSV veri dosyaları")
+    parser.add_argument('--cikti', default='raporlar', help="Raporların yazılacağı klasör")
+    parser.add_argument('--hedef', type=int, default=90, help="Hedef başarı (%%)")
+    parser.add_argument('--alt-sinir', type=int, default=70, help="Alt sınır (%%)")
+    parser.add_argument('--baslangic', help="Başlangıç tarihi (YYYY-AA-GG)")
+    parser.add_argument('--bitis', help="Bitiş tarihi (YYYY-AA-GG)")
+    parser.add_argument('--asi', action='append', default=[], help="Aşı adı (birden çok verilebilir)")
+    parser.add_argument('--doz', type=int, action='append', default=[], help="Doz (birden çok verilebilir)")
+    parser.add_argument('--format', choices=['pdf', 'xlsx', 'hepsi'], default='hepsi')
+    parser.add_argument('--isci', type=int, default=None, help="Paralel işçi süreç sayısı")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    start = time.perf_counter()
+
+    date_range = None
+    if args.baslangic or args.bitis:
+        if not (args.baslangic and args.bitis):
+            print("Tarih aralığı için --baslangic ve --bitis birlikte verilmelidir.", file=sys.stderr)
+            return 2
+        date_range = (pd.Timestamp(args.baslangic), pd.Timestamp(args.bitis))
+
+    df, load_errors = load_inputs(args.dosyalar, workers=args.isci)
+    for path, hata in load_errors.items():
+        print(f"Dosya okuma hatası ({path}): {hata}", file=sys.stderr)
+    if df is None:
+        print("Okunabilen veri dosyası yok.", file=sys.stderr)
+        return 1
+    print(f"{len(df):,} kayıt okundu ({time.perf_counter() - start:.1f} sn).")
+    eksik = (df['asm'] == "Belirtilmemiş").to_numpy()
+    if eksik.any():
+        unmatched = asm_mapping.unmatched_units(df['birim'][eksik], np.ones(int(eksik.sum()), dtype='int64'))
+        print(f"Uyarı: {len(unmatched)} birimin ASM'si bulunamadı ({int(eksik.sum()):,} kayıt 'Belirtilmemiş').", file=sys.stderr)
+
+    jobs = build_jobs(df, args.hedef, args.alt_sinir, args.asi, args.doz, date_range)
+    if not jobs:
+        print("Seçilen kriterlere uygun veri bulunamadı.", file=sys.stderr)
+        return 1
+    print(f"{len(jobs) - 1} ilçe analiz edildi ({time.perf_counter() - start:.1f} sn).")
+
+    formats = ('pdf', 'xlsx') if args.format == 'hepsi' else (args.format,)
+    done = []
+    def on_done(name):
+        done.append(name)
+        print(f"  [{len(done)}/{len(jobs)}] {name}")
+    written, errors = render_all(jobs, args.cikti, formats, workers=args.isci, on_done=on_done)
+    for name, hata in errors.items():
+        print(f"Rapor hatası ({name}): {hata}", file=sys.stderr)
+
+    n_files = sum(len(v) for v in written.values())
+    print(f"{n_files} dosya '{args.cikti}' klasörüne yazıldı ({time.perf_counter() - start:.1f} sn).")
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""ASM anahtar üretimi: satır bazlı apply ile vektörel motorun karşılaştırması.
+
+Kullanım: python benchmarks/bench_asm_keys.py --rows 1000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from asm_mapping import extract_key_from_unit_name, load_asm_mapping, map_units_to_asm  # noqa: E402
+
+
+def sample_units(rows, seed=0):
+    """ASM listesindeki birim adlarından rastgele bir birim sütunu üretir."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    units = pd.read_excel(os.path.join(root, "ASM.xlsx"))["Birim Adı"].to_numpy(dtype=object)
+    rng = np.random.default_rng(seed)
+    return pd.Series(units[rng.integers(0, len(units), rows)], dtype=object)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    asm_map = load_asm_mapping()
+    os.chdir(cwd)
+    birim = sample_units(args.rows)
+
+    t0 = time.perf_counter()
+    eski = birim.apply(lambda x: extract_key_from_unit_name(str(x))).map(asm_map)
+    t_eski = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    yeni = map_units_to_asm(birim, asm_map)
+    t_yeni = time.perf_counter() - t0
+
+    bos = eski.isna().to_numpy()
+    ayni = bool((bos == yeni.isna().to_numpy()).all()
+                and (eski.to_numpy(dtype=object)[~bos] == yeni.to_numpy(dtype=object)[~bos]).all())
+    print(f"satır: {args.rows:,}  farklı birim: {birim.nunique():,}")
+    print(f"satır bazlı apply : {t_eski:8.3f} sn")
+    print(f"vektörel motor    : {t_yeni:8.3f} sn")
+    print(f"hızlanma          : {t_eski / t_yeni:8.1f}x")
+    print(f"sonuçlar aynı     : {ayni}")
+    if not ayni:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
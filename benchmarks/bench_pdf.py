@@ -0,0 +1,67 @@
+"""PDF tablo yazımı: hücre bazlı yol ile hızlı (sayfa gruplu) yolun karşılaştırması.
+
+Kullanım: python benchmarks/bench_pdf.py --rows 10000
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reports import create_pdf  # noqa: E402
+
+
+def sample_unit_table(rows, seed=0):
+    """Birim Performans raporuna benzeyen bir özet tablosu üretir."""
+    rng = np.random.default_rng(seed)
+    ilceler = np.array(["KADIKÖY", "ÜSKÜDAR", "ŞİŞLİ", "BEŞİKTAŞ", "ÇEKMEKÖY", "AVCILAR"], dtype=object)
+    ilce = ilceler[rng.integers(0, len(ilceler), rows)]
+    no = rng.integers(1, 300, rows)
+    toplam = rng.integers(20, 600, rows)
+    yapilan = (toplam * rng.uniform(0.4, 1.0, rows)).astype(int)
+    return pd.DataFrame({
+        'ilce': ilce,
+        'asm': [f"İSTANBUL {i} {n // 5 + 1} NOLU AİLE SAĞLIĞI MERKEZİ" for i, n in zip(ilce, no)],
+        'birim': [f"İSTANBUL {i} {n} NOLU AİLE HEKİMLİĞİ BİRİMİ" for i, n in zip(ilce, no)],
+        'toplam': toplam,
+        'yapilan': yapilan,
+        'oran': np.round(yapilan / toplam * 100, 2),
+    })
+
+
+def page_count(pdf_bytes):
+    return len(re.findall(rb'/Type /Page\b', pdf_bytes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000)
+    args = parser.parse_args()
+
+    df = sample_unit_table(args.rows)
+    meta = {"tarih_araligi": "Tumu", "ilce": "Tümü", "asm": "Tümü", "asi": "Tümü", "doz": "",
+            "hedef": 90, "alt_sinir": 70, "genel_basari_orani": 81.3, "dusuk_birim_sayisi": 120}
+
+    sonuc = {}
+    for ad, fast in [("hücre bazlı", False), ("hızlı", True)]:
+        t0 = time.perf_counter()
+        pdf = create_pdf(df, "Birim Performans (Sayisal)", meta, fast=fast)
+        sure = time.perf_counter() - t0
+        sayfa = page_count(pdf)
+        sonuc[ad] = re.sub(rb'/CreationDate \(D:\d+\)', b'', pdf)
+        print(f"{ad:12s}: {sure:7.3f} sn  {sayfa} sayfa  {sayfa / sure:8.1f} sayfa/sn")
+
+    ayni = sonuc["hücre bazlı"] == sonuc["hızlı"]
+    print(f"çıktılar aynı: {ayni}")
+    if not ayni:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""Okuma, eşleştirme, analiz ve dışa aktarım adımlarının süre/bellek ölçümü (Streamlit gerektirmez).
+
+Kullanım:
+    python benchmarks/bench_pipeline.py --rows 100000
+    python benchmarks/bench_pipeline.py --rows 100000 --save-baseline
+    python benchmarks/bench_pipeline.py --rows 1000000 --format csv --sonuc sonuc.json
+
+Veri benchmarks/synthetic_data.py ile geçici bir klasöre üretilir. Her adım için en iyi
+süre (--repeat), RSS artışı ve tracemalloc tepe değeri JSON olarak yazılır; kayıtlı taban
+çizgisi (benchmarks/baseline.json) varsa sonuçlar onunla karşılaştırılır.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import analysis  # noqa: E402
+import asm_mapping  # noqa: E402
+import ingest  # noqa: E402
+import synthetic_data  # noqa: E402
+from reports import create_pdf, to_excel  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+TARGET, MINIMUM = 90, 70
+
+# -----------------------------------------------------------------------------
+# BELLEK ÖLÇÜMÜ
+# -----------------------------------------------------------------------------
+
+class RssSampler:
+    """Adım boyunca süreç RSS değerini örnekler; en yüksek artışı (MB) verir.
+
+    /proc bulunmayan sistemlerde None döner. pyarrow tamponları gibi tracemalloc'un
+    göremediği ayırmaları da kapsar.
+    """
+
+    def __init__(self, interval=0.002):
+        self.interval = interval
+        self.available = os.path.exists("/proc/self/statm")
+        self.page = os.sysconf("SC_PAGE_SIZE") if self.available else 0
+
+    def _rss(self):
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * self.page
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self._rss())
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        if self.available:
+            self.start = self.peak = self._rss()
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.available:
+            self._stop.set()
+            self._thread.join()
+            self.peak = max(self.peak, self._rss())
+
+    @property
+    def delta_mb(self):
+        return round((self.peak - self.start) / 2**20, 1) if self.available else None
+
+# -----------------------------------------------------------------------------
+# ADIMLAR
+# -----------------------------------------------------------------------------
+
+def stage_functions(data, name, workdir):
+    """(ad, fonksiyon) listesi; her fonksiyon önceki adımların çıktısını ctx sözlüğünden alır."""
+    def parse(ctx):
+        ctx['raw'] = ingest.read_raw(data, name)
+        return len(ctx['raw'])
+
+    def mapping(ctx):
+        # load_asm_mapping çalışma dizinindeki ASM dosyasını okur.
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            ctx['asm_map'] = asm_mapping.load_asm_mapping()
+        finally:
+            os.chdir(cwd)
+        mapped = asm_mapping.map_units_to_asm(ctx['raw']['BIRIM_ADI'], ctx['asm_map'])
+        return int(mapped.notna().sum())
+
+    def normalize(ctx):
+        ctx['df'] = ingest.normalize_frame(ctx['raw'].copy(), ctx['asm_map'])
+        return len(ctx['df'])
+
+    def csv_stream(ctx):
+        # Parçalı okuma: okuma + normalizasyon tek adımda (parse + normalize ile karşılaştırılır).
+        df, _ = ingest.read_csv_normalized(data, ctx['asm_map'])
+        return len(df)
+
+    def cube(ctx):
+        ctx['cube'] = analysis.build_cube(ctx['df'])
+        return len(ctx['cube'])
+
+    def filtering(ctx):
+        # Panelin varsayılan seçimi: tüm ilçeler, verinin tüm tarih aralığı.
+        c = ctx['cube']
+        ctx['date_range'] = (c['gun'].min(), c['gun'].max())
+        ctx['cube_res'] = analysis.filter_cube(c, date_range=ctx['date_range'])
+        return len(ctx['cube_res'])
+
+    def aggregate(ctx):
+        ctx['tables'] = analysis.report_tables(ctx['cube_res'], TARGET, MINIMUM)
+        return len(ctx['tables']['ozet'])
+
+    def excel(ctx):
+        return len(to_excel(ctx['tables']['ozet']))
+
+    def pdf(ctx):
+        tables = ctx['tables']
+        meta = {
+            "tarih_araligi": "Tumu", "ilce": "Tümü", "asm": "Tümü", "asi": "Tümü", "doz": "",
+            "hedef": TARGET, "alt_sinir": MINIMUM,
+            "genel_basari_orani": tables['genel_oran'], "dusuk_birim_sayisi": len(tables['acil']),
+        }
+        return len(create_pdf(tables['ozet'], "Birim Performans (Sayisal)", meta))
+
+    stages = [("parse", parse), ("asm_mapping", mapping), ("normalize", normalize)]
+    if name.endswith('.csv'):
+        stages.append(("csv_stream", csv_stream))
+    return stages + [
+        ("cube", cube), ("filter", filtering), ("aggregate", aggregate), ("to_excel", excel), ("create_pdf", pdf),
+    ]
+
+def run_stages(stages, repeat=1, trace=True):
+    """Adımları sırayla çalıştırır; her adım için süre ve bellek ölçümlerini döndürür."""
+    results = {}
+    ctx = {}
+    for name, func in stages:
+        times = []
+        for _ in range(max(repeat, 1)):
+            with RssSampler() as rss:
+                t = time.perf_counter()
+                out = func(ctx)
+                times.append(time.perf_counter() - t)
+        result = {"seconds": round(min(times), 4), "output": out, "rss_delta_mb": rss.delta_mb}
+        if trace:
+            # tracemalloc ölçümü süreyi şişirdiği için ayrı bir çalıştırmada alınır.
+            tracemalloc.start()
+            func(ctx)
+            result["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+            tracemalloc.stop()
+        results[name] = result
+        print(f"  {name:<12} {result['seconds']:>9.3f} sn   RSS +{result['rss_delta_mb']} MB"
+              + (f"   tepe {result['peak_mb']} MB" if trace else ""))
+    return results
+
+# -----------------------------------------------------------------------------
+# SONUÇLAR VE TABAN ÇİZGİSİ
+# -----------------------------------------------------------------------------
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {
+        "python": platform.python_version(), "pandas": pd.__version__,
+        "platform": platform.platform(), "cpu_count": os.cpu_count(), "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+def compare(results, baseline, tolerance):
+    """Sonuçları taban çizgisiyle karşılaştırır; eşik üstü gerilemelerin listesini döndürür."""
+    comparable = baseline.get("rows") == results["rows"] and baseline.get("format") == results["format"]
+    if not comparable:
+        print(f"Uyarı: taban çizgisi {baseline.get('rows')} kayıt/{baseline.get('format')} ile ölçülmüş; "
+              f"karşılaştırma yalnızca yol göstericidir.")
+    regressions = []
+    print(f"\n  {'adım':<12} {'taban':>9} {'şimdi':>9} {'oran':>7}")
+    for name, cur in results["stages"].items():
+        base = baseline.get("stages", {}).get(name)
+        if not base:
+            continue
+        ratio = cur["seconds"] / base["seconds"] if base["seconds"] else float("inf")
+        mark = ""
+        # Milisaniyelik adımlarda ölçüm gürültüsü gerileme sayılmaz.
+        if ratio > 1 + tolerance and cur["seconds"] - base["seconds"] > 0.01:
+            mark = "  << yavaşladı"
+            regressions.append(f"{name}: süre x{ratio:.2f}")
+        if cur.get("peak_mb") and base.get("peak_mb") and cur["peak_mb"] > base["peak_mb"] * (1 + tolerance):
+            mark += "  << bellek arttı"
+            regressions.append(f"{name}: bellek {base['peak_mb']} -> {cur['peak_mb']} MB")
+        print(f"  {name:<12} {base['seconds']:>9.3f} {cur['seconds']:>9.3f} {ratio:>6.2f}x{mark}")
+    return regressions if comparable else []
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aşı performans işlem hattı benchmark'ı.")
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--format', choices=['csv', 'xlsx'], default='csv')
+    parser.add_argument('--repeat', type=int, default=3, help="Her adım kaç kez ölçülsün (en iyisi alınır)")
+    parser.add_argument('--no-tracemalloc', action='store_true', help="tracemalloc tepe ölçümünü atla")
+    parser.add_argument('--sonuc', default=None, help="Sonuçların yazılacağı JSON dosyası")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Karşılaştırılacak taban çizgisi")
+    parser.add_argument('--save-baseline', action='store_true', help="Sonuçları taban çizgisi olarak kaydet")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="İzin verilen göreli gerileme")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        catalogue = synthetic_data.unit_catalogue(args.seed)
+        path = os.path.join(workdir, f"veri.{args.format}")
+        t = time.perf_counter()
+        synthetic_data.write_frame(synthetic_data.generate(args.rows, args.seed, catalogue), path)
+        synthetic_data.write_frame(synthetic_data.asm_file_frame(catalogue, seed=args.seed), os.path.join(workdir, "ASM.xlsx"))
+        print(f"{args.rows:,} kayıt üretildi ({time.perf_counter() - t:.1f} sn), {os.path.getsize(path) / 2**20:.1f} MB")
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        stages = stage_functions(data, os.path.basename(path), workdir)
+        results = {
+            "rows": args.rows, "format": args.format, "seed": args.seed,
+            "environment": environment(),
+            "stages": run_stages(stages, args.repeat, trace=not args.no_tracemalloc),
+        }
+
+    if args.sonuc:
+        with open(args.sonuc, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Sonuçlar -> {args.sonuc}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Taban çizgisi kaydedildi -> {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nGerilemeler:\n  " + "\n  ".join(regressions))
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""Gerçek veriye benzeyen sentetik aşı kayıtları ve ASM eşleştirme dosyası üretir.
+
+Kullanım:
+    python benchmarks/synthetic_data.py --rows 1000000 --cikti /tmp/veri.csv --asm-cikti /tmp/ASM.xlsx
+
+Sütunlar panelin beklediği dışa aktarım biçimindedir (ILCE, asm, BIRIM_ADI, ASI_SON_TARIH,
+ASI_YAP_TARIH, ASI_DOZU, ASI_ADI); birim adları "İSTANBUL <İLÇE> <n> NOLU AİLE HEKİMLİĞİ BİRİMİ"
+kalıbındadır. Gerçek veri kullanılmaz; aynı tohum her zaman aynı veriyi üretir.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ILCELER = [
+    "ADALAR", "ARNAVUTKÖY", "ATAŞEHİR", "AVCILAR", "BAĞCILAR", "BAHÇELİEVLER", "BAKIRKÖY",
+    "BAŞAKŞEHİR", "BAYRAMPAŞA", "BEŞİKTAŞ", "BEYKOZ", "BEYLİKDÜZÜ", "BEYOĞLU", "BÜYÜKÇEKMECE",
+    "ÇATALCA", "ÇEKMEKÖY", "ESENLER", "ESENYURT", "EYÜPSULTAN", "FATİH", "GAZİOSMANPAŞA",
+    "GÜNGÖREN", "KADIKÖY", "KAĞITHANE", "KARTAL", "KÜÇÜKÇEKMECE", "MALTEPE", "PENDİK",
+    "SANCAKTEPE", "SARIYER", "SİLİVRİ", "SULTANBEYLİ", "SULTANGAZİ", "ŞİLE", "ŞİŞLİ",
+    "TUZLA", "ÜMRANİYE", "ÜSKÜDAR", "ZEYTİNBURNU",
+]
+ASILAR = ["KKK", "DaBT-İPA-Hib", "OPA", "HEP-B", "HEP-A", "BCG", "KPA", "SUÇİÇEĞİ", "Td"]
+# Aşı başına verilen en yüksek doz (doz dağılımı için).
+ASI_DOZLARI = {"KKK": 2, "DaBT-İPA-Hib": 4, "OPA": 2, "HEP-B": 3, "HEP-A": 2, "BCG": 1, "KPA": 4, "SUÇİÇEĞİ": 1, "Td": 1}
+
+# -----------------------------------------------------------------------------
+# BİRİM KATALOĞU
+# -----------------------------------------------------------------------------
+
+def unit_catalogue(seed=0, asm_per_ilce=(10, 45), units_per_asm=(2, 8)):
+    """İlçe/ASM/birim üçlülerinden oluşan sabit bir katalog üretir (~5.000 birim)."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for ilce in ILCELER:
+        n_asm = int(rng.integers(*asm_per_ilce))
+        birim_no = 0
+        for asm_no in range(1, n_asm + 1):
+            asm = f"İSTANBUL {ilce} {asm_no} NOLU AİLE SAĞLIĞI MERKEZİ"
+            for _ in range(int(rng.integers(*units_per_asm))):
+                birim_no += 1
+                rows.append((ilce, asm, f"İSTANBUL {ilce} {birim_no} NOLU AİLE HEKİMLİĞİ BİRİMİ"))
+    return pd.DataFrame(rows, columns=['ilce', 'asm', 'birim'])
+
+def asm_file_frame(catalogue, unmatched=0.02, seed=0):
+    """Katalogdan ASM.xlsx biçiminde eşleştirme tablosu üretir; birimlerin bir kısmı bilerek dışarıda bırakılır."""
+    rng = np.random.default_rng(seed + 1)
+    keep = rng.random(len(catalogue)) >= unmatched
+    part = catalogue[keep]
+    return pd.DataFrame({
+        'İl': "İSTANBUL", 'İlçe': part['ilce'].to_numpy(),
+        'Birim Adı': part['birim'].to_numpy(), 'Aile Sağlığı Merkezi Adı': part['asm'].to_numpy(),
+    })
+
+# -----------------------------------------------------------------------------
+# KAYIT ÜRETİMİ
+# -----------------------------------------------------------------------------
+
+def generate(rows, seed=0, catalogue=None, start='2024-01-01', days=365, done_rate=0.82, asm_filled=0.3):
+    """İstenen sayıda aşı kaydı üretir.
+
+    Birim başarı oranları birimden birime değişir (kırmızı/sarı/yeşil dağılımı için);
+    'asm' sütunu kayıtların yalnızca bir kısmında doludur, kalanı eşleştirmeyle bulunur.
+    """
+    rng = np.random.default_rng(seed)
+    catalogue = unit_catalogue(seed) if catalogue is None else catalogue
+    n_units = len(catalogue)
+
+    # Büyük birimler daha çok kayıt alır.
+    weights = rng.gamma(2.0, 1.0, n_units)
+    unit_idx = rng.choice(n_units, size=rows, p=weights / weights.sum())
+    unit_rate = np.clip(rng.normal(done_rate, 0.12, n_units), 0.2, 1.0)
+
+    asi_codes = rng.integers(0, len(ASILAR), rows)
+    max_doz = np.array([ASI_DOZLARI[a] for a in ASILAR])[asi_codes]
+    doz = (rng.random(rows) * max_doz).astype(np.int64) + 1
+
+    hedef = np.datetime64(start, 'D') + rng.integers(0, days, rows).astype('timedelta64[D]')
+    yapildi = rng.random(rows) < unit_rate[unit_idx]
+    gecikme = rng.integers(-10, 30, rows).astype('timedelta64[D]')
+    yapilan = np.where(yapildi, hedef + gecikme, np.datetime64('NaT'))
+
+    asm = catalogue['asm'].to_numpy(dtype=object)[unit_idx]
+    asm = np.where(rng.random(rows) < asm_filled, asm, None)
+
+    return pd.DataFrame({
+        'ILCE': catalogue['ilce'].to_numpy(dtype=object)[unit_idx],
+        'asm': asm,
+        'BIRIM_ADI': catalogue['birim'].to_numpy(dtype=object)[unit_idx],
+        'ASI_SON_TARIH': pd.to_datetime(hedef),
+        'ASI_YAP_TARIH': pd.to_datetime(yapilan),
+        'ASI_DOZU': doz,
+        'ASI_ADI': np.array(ASILAR, dtype=object)[asi_codes],
+    })
+
+def write_frame(df, path):
+    """Uzantıya göre CSV (cp1254, panelin okuduğu kodlama) ya da Excel olarak yazar."""
+    if path.endswith('.csv'):
+        df.to_csv(path, index=False, encoding='cp1254')
+    else:
+        if len(df) > 1_048_575:
+            raise ValueError("Excel dosyası en fazla 1.048.575 kayıt alabilir; büyük veri için .csv kullanın.")
+        df.to_excel(path, index=False)
+
+# -----------------------------------------------------------------------------
+# KOMUT SATIRI
+# -----------------------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sentetik aşı kaydı üretici.")
+    parser.add_argument('--rows', type=int, default=100_000, help="Kayıt sayısı (10 bin - 10 milyon)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cikti', default='sentetik_veri.csv', help="Veri dosyası (.csv ya da .xlsx)")
+    parser.add_argument('--asm-cikti', default=None, help="ASM eşleştirme dosyası (ör. ASM.xlsx)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    catalogue = unit_catalogue(args.seed)
+    df = generate(args.rows, args.seed, catalogue)
+    write_frame(df, args.cikti)
+    print(f"{len(df):,} kayıt, {len(catalogue):,} birim -> {args.cikti} ({time.perf_counter() - start:.1f} sn)")
+    if args.asm_cikti:
+        write_frame(asm_file_frame(catalogue, seed=args.seed), args.asm_cikti)
+        print(f"ASM eşleştirme dosyası -> {args.asm_cikti}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
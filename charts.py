@@ -0,0 +1,167 @@
+"""Performans grafikleri: birim sayısı ne olursa olsun boyutu sınırlı kalan Plotly şekilleri.
+
+Şekiller plotly.express yerine doğrudan graph_objects ile, önceden hesaplanmış dizilerden
+kurulur. Çubuk sayısı MAX_BARS'ı aşarsa birimler ASM bazında toplanır ya da yalnızca en
+başarılı/en düşük birimler ve oranların dağılımı (histogram) çizilir.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+import analysis
+
+# Bu sayının üstünde birimler tek tek çizilmez (ASI_MAX_BARS ile değiştirilebilir).
+MAX_BARS = int(os.environ.get("ASI_MAX_BARS", 60))
+# "En iyi/en düşük" görünümünde her uçtan gösterilen birim sayısı.
+TOP_N = 15
+# Histogram dilimleri: %0-100 arası %5'lik aralıklar.
+HIST_EDGES = np.arange(0, 105, 5)
+
+STATUS_COLORS = {
+    analysis.STATUS_GREEN: '#0d6efd',
+    analysis.STATUS_YELLOW: '#ffc107',
+    analysis.STATUS_RED: '#dc3545',
+}
+# Lejant sırası px.bar ile aynı kalsın diye yeşilden kırmızıya.
+LEGEND_ORDER = (2, 1, 0)
+
+MODE_AUTO = "Otomatik"
+MODE_ALL = "Tüm birimler"
+MODE_ASM = "ASM bazında"
+MODE_EXTREMES = "En iyi / en düşük birimler"
+CHART_MODES = (MODE_AUTO, MODE_ALL, MODE_ASM, MODE_EXTREMES)
+
+# -----------------------------------------------------------------------------
+# GÖRÜNÜM SEÇİMİ
+# -----------------------------------------------------------------------------
+
+def resolve_mode(mode, group_col, n_units, n_asms, max_bars=MAX_BARS):
+    """İstenen görünümü veriye göre kesinleştirir.
+
+    İlçe bazındaki grafik her zaman tüm çubuklarla çizilir. Otomatik kipte birim sayısı
+    sınırı aşarsa ASM bazına, ASM sayısı da aşarsa en iyi/en düşük görünümüne geçilir.
+    """
+    if group_col != 'birim':
+        return MODE_ALL
+    if mode == MODE_AUTO:
+        if n_units <= max_bars:
+            return MODE_ALL
+        return MODE_ASM if n_asms <= max_bars else MODE_EXTREMES
+    return mode
+
+# -----------------------------------------------------------------------------
+# ŞEKİLLER
+# -----------------------------------------------------------------------------
+
+def status_bar_figure(labels, rates, codes, title, x_label, height):
+    """Durum renkli çubuk grafik; her durum tek bir iz (trace) olarak dizilerden kurulur.
+
+    Çubuklar verilen sırada kalır (kategori sırası açıkça verilir).
+    """
+    labels = np.asarray(labels, dtype=object)
+    rates = np.asarray(rates, dtype='float64')
+    codes = np.asarray(codes)
+    fig = go.Figure()
+    for code in LEGEND_ORDER:
+        sel = codes == code
+        if not sel.any():
+            continue
+        status = analysis.STATUS_LABELS[code]
+        fig.add_trace(go.Bar(
+            x=labels[sel], y=rates[sel], name=status, legendgroup=status,
+            marker_color=STATUS_COLORS[status], text=rates[sel], textposition='outside',
+        ))
+    fig.update_layout(
+        title=title, height=height, barmode='relative', legend_title_text='Durum',
+        xaxis_title=x_label, yaxis_title="Başarı Oranı (%)",
+        xaxis={'categoryorder': 'array', 'categoryarray': labels},
+    )
+    return fig
+
+def rate_histogram_figure(rates, codes, target, minimum, title="Birim Başarı Oranı Dağılımı", height=350):
+    """Oranların %5'lik dilimlerdeki birim sayıları; dilimler duruma göre yığılır, eşikler çizgiyle gösterilir."""
+    rates = np.asarray(rates, dtype='float64')
+    codes = np.asarray(codes)
+    valid = np.isfinite(rates)
+    centers = (HIST_EDGES[:-1] + HIST_EDGES[1:]) / 2
+    fig = go.Figure()
+    for code in LEGEND_ORDER:
+        counts, _ = np.histogram(np.clip(rates[valid & (codes == code)], 0, 100), bins=HIST_EDGES)
+        if not counts.any():
+            continue
+        status = analysis.STATUS_LABELS[code]
+        fig.add_trace(go.Bar(x=centers, y=counts, width=5, name=status, legendgroup=status,
+                             marker_color=STATUS_COLORS[status], showlegend=False))
+    fig.add_vline(x=minimum, line_dash='dot', line_color=STATUS_COLORS[analysis.STATUS_YELLOW])
+    fig.add_vline(x=target, line_dash='dot', line_color=STATUS_COLORS[analysis.STATUS_GREEN])
+    fig.update_layout(title=title, height=height, barmode='stack', bargap=0.05,
+                      xaxis_title="Başarı Oranı (%)", yaxis_title="Birim Sayısı",
+                      xaxis={'range': [0, 100]})
+    return fig
+
+def extremes(order, n):
+    """Azalan oran sırasındaki konumlardan ilk (en iyi) ve son (en düşük) n tanesi."""
+    if len(order) <= 2 * n:
+        return order
+    return np.concatenate([order[:n], order[-n:]])
+
+def performance_figures(res, mode, target, minimum, max_bars=MAX_BARS, top_n=TOP_N):
+    """Filtre sonucu için (görünüm, şekil listesi) döndürür.
+
+    res, app.filter_results'ın sözlüğüdür; chart_data ve (birim bazında) asm_chart_data
+    oranına göre azalan sıradadır.
+    """
+    chart_data = res['chart_data']
+    group_col = res['group_col']
+    asm_data = res.get('asm_chart_data') if group_col == 'birim' else None
+    mode = resolve_mode(mode, group_col, len(chart_data), len(asm_data) if asm_data is not None else 0, max_bars)
+
+    if group_col == 'ilce':
+        x_label, height = "İlçe", 500
+    else:
+        x_label, height = "Aile Hekimliği Birimi (AHB)", 600
+
+    if mode == MODE_ASM:
+        codes = analysis.classify_rates(asm_data['oran'], target, minimum).cat.codes.to_numpy()
+        fig = status_bar_figure(asm_data['asm'].to_numpy(), asm_data['oran'].to_numpy(), codes,
+                                f"Performans Dağılımı (ASM, {len(chart_data)} birim)", "Aile Sağlığı Merkezi (ASM)", height)
+        return mode, [fig]
+
+    labels = chart_data[group_col].to_numpy()
+    rates = chart_data['oran'].to_numpy()
+    codes = res['chart_index'].codes(target, minimum)
+    if mode == MODE_EXTREMES:
+        valid = np.flatnonzero(np.isfinite(rates))
+        pos = extremes(valid, top_n)
+        fig = status_bar_figure(labels[pos], rates[pos], codes[pos],
+                                f"En Başarılı ve En Düşük {top_n} Birim ({len(chart_data)} birim içinden)", x_label, height)
+        if len(pos) < len(valid):
+            # En iyi ve en düşük gruplarını ayıran çizgi.
+            fig.add_vline(x=top_n - 0.5, line_dash='dash', line_color='#adb5bd')
+        return mode, [fig, rate_histogram_figure(rates, codes, target, minimum)]
+
+    fig = status_bar_figure(labels, rates, codes, f"Performans Dağılımı ({x_label})", x_label, height)
+    return mode, [fig]
+
+def trend_figure(trend, title="Zaman Serisi Trendi", series=None):
+    """Dönem bazında başarı oranı çizgisi; SERI sütunu varsa her seri ayrı bir çizgidir.
+
+    trend, analysis.TrendEngine.trend çıktısıdır; series verilirse yalnızca o seriler çizilir.
+    """
+    periods = trend.drop_duplicates('DONEM').sort_values('BASLANGIC')['DONEM'].to_numpy()
+    fig = go.Figure()
+    if 'SERI' in trend.columns:
+        names = trend['SERI'].to_numpy()
+        for name in (series if series is not None else pd.unique(names)):
+            sel = names == name
+            fig.add_trace(go.Scatter(x=trend['DONEM'].to_numpy()[sel], y=trend['ORAN'].to_numpy()[sel],
+                                     mode='lines+markers', name=str(name)))
+    else:
+        fig.add_trace(go.Scatter(x=trend['DONEM'].to_numpy(), y=trend['ORAN'].to_numpy(),
+                                 mode='lines+markers', name="Başarı Oranı", showlegend=False))
+    fig.update_layout(title=title, xaxis_title="Dönem", yaxis_title="Başarı Oranı (%)",
+                      xaxis={'type': 'category', 'categoryorder': 'array', 'categoryarray': periods})
+    return fig
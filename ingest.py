@@ -0,0 +1,485 @@
+"""Yüklenen aşı dosyalarının okunması, normalize edilmesi ve disk önbelleği."""
+
+import hashlib
+import io
+import multiprocessing
+import os
+import threading
+import warnings
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+import perf
+from asm_mapping import fingerprint_pairs, map_units_to_asm
+
+# -----------------------------------------------------------------------------
+# AYARLAR
+# -----------------------------------------------------------------------------
+
+# Önbellek dizini ASI_CACHE_DIR ortam değişkeniyle değiştirilebilir.
+CACHE_DIR = os.environ.get(
+    "ASI_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "ingest"),
+)
+# Normalizasyon mantığı değiştiğinde artırılır; eski önbellek dosyaları kullanılmaz.
+CACHE_VERSION = 3
+# Önbelleğin disk sınırı (ASI_CACHE_MAX_MB); aşılırsa en uzun süredir kullanılmayan dosyalar silinir.
+CACHE_MAX_MB = int(os.environ.get("ASI_CACHE_MAX_MB", "1024"))
+# Paralel dosya okumada kullanılacak işçi süreç sayısı (ASI_INGEST_WORKERS).
+# Her işçi kendi pandas kopyasını taşıdığı için varsayılan değer sınırlıdır.
+INGEST_WORKERS = int(os.environ.get("ASI_INGEST_WORKERS", min(4, os.cpu_count() or 1)))
+# Süreç havuzu bu kadar saniye boşta kalırsa kapatılır ve işçilerin belleği geri verilir (ASI_POOL_IDLE_SECONDS).
+POOL_IDLE_SECONDS = float(os.environ.get("ASI_POOL_IDLE_SECONDS", 60))
+
+RENAME_MAP = {
+    'ILCE': 'ilce', 'asm': 'asm', 'BIRIM_ADI': 'birim',
+    'ASI_SON_TARIH': 'hedef_tarih', 'ASI_YAP_TARIH': 'yapilan_tarih',
+    'ASI_DOZU': 'doz', 'ASI_ADI': 'asi'
+}
+KEEP_COLUMNS = list(RENAME_MAP.values())
+TEXT_COLUMNS = ['ilce', 'asm', 'birim', 'asi']
+DATE_COLUMNS = ['hedef_tarih', 'yapilan_tarih']
+
+CSV_ENCODING = 'cp1254'
+# CSV dosyaları bu kadar satırlık parçalar hâlinde okunup normalize edilir (ASI_CSV_CHUNK_ROWS).
+CSV_CHUNK_ROWS = int(os.environ.get("ASI_CSV_CHUNK_ROWS", 250_000))
+# Metin tarihlerin biçimi dosyanın bu kadar ilk satırından bir kez çıkarılır.
+DATE_SAMPLE_ROWS = 1000
+
+# -----------------------------------------------------------------------------
+# OKUMA & NORMALİZASYON
+# -----------------------------------------------------------------------------
+
+def file_hash(data):
+    """Dosya içeriğinin SHA-256 özetini döndürür."""
+    return hashlib.sha256(data).hexdigest()
+
+def mapping_fingerprint(asm_map):
+    """ASM eşleştirme sözlüğünün kısa özetini döndürür (önbellek anahtarı için)."""
+    if not asm_map:
+        return "nomap"
+    # Derlenmiş indeks özetini derleme sırasında hesaplar.
+    fingerprint = getattr(asm_map, 'fingerprint', None)
+    if fingerprint:
+        return fingerprint
+    keys = sorted(asm_map)
+    return fingerprint_pairs(keys, [asm_map[k] for k in keys])
+
+def read_raw(data, name):
+    """Ham dosya içeriğini uzantısına göre DataFrame olarak okur."""
+    if name.endswith('.csv'):
+        return pd.read_csv(io.BytesIO(data), encoding=CSV_ENCODING)
+    return pd.read_excel(io.BytesIO(data))
+
+def csv_reader_options(data):
+    """Yalnızca RENAME_MAP sütunlarını okuyan read_csv seçenekleri (başlık satırından kurulur).
+
+    Başlıktaki boşluklar normalize_frame'deki gibi yok sayılır. Metin ve tarih sütunları str
+    olarak okunur (tarihler normalize_frame'de tek bir biçimle çevrilir); kullanılmayan
+    sütunlar hiç yüklenmez.
+    """
+    header = pd.read_csv(io.BytesIO(data), encoding=CSV_ENCODING, nrows=0).columns
+    source = {str(c).strip(): c for c in header}
+    target = {v: source[k] for k, v in RENAME_MAP.items() if k in source}
+    return {
+        'usecols': list(target.values()),
+        'dtype': {target[c]: str for c in TEXT_COLUMNS + DATE_COLUMNS if c in target},
+    }
+
+def infer_date_format(values):
+    """Metin tarihlerin biçimini ilk DATE_SAMPLE_ROWS satırdan çıkarır; bulunamazsa None.
+
+    Gün/ay sırası belirsizse (05.03.2024) örneğin en çoğunu çözen biçim seçilir; eşitlikte
+    gün önce (dd.mm.yyyy) kabul edilir. Yıl önce gelen biçimler yıl-ay-gün okunur.
+    """
+    sample = values.head(DATE_SAMPLE_ROWS).dropna().astype(str)
+    if sample.empty:
+        return None
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)
+        formats = [guess_datetime_format(sample.iloc[0], dayfirst=True),
+                   guess_datetime_format(sample.iloc[0], dayfirst=False)]
+    if formats[1] and formats[1].startswith('%Y'):
+        formats.reverse()
+    best, best_count = None, 0
+    for fmt in dict.fromkeys(f for f in formats if f):
+        count = int(pd.to_datetime(sample, format=fmt, errors='coerce').notna().sum())
+        if count > best_count:
+            best, best_count = fmt, count
+    return best
+
+def date_formats(df):
+    """Metin olarak okunmuş tarih sütunlarının biçimleri ({sütun: biçim})."""
+    return {col: infer_date_format(df[col]) for col in DATE_COLUMNS
+            if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col].dtype)}
+
+def read_csv_normalized(data, asm_map, chunksize=CSV_CHUNK_ROWS):
+    """CSV'yi parça parça okur; her parça bir sonraki okunmadan normalize edilip sıkıştırılır.
+
+    Bellekte ham veri olarak en fazla bir parça bulunur; tepe bellek dosya boyutuyla değil
+    parça boyutu ve sıkıştırılmış sonuçla sınırlıdır. Tarih biçimi dosyanın başından bir kez
+    çıkarılıp her parçaya aynı biçim uygulanır; sonuç parça boyutundan bağımsızdır ve
+    read_raw + normalize_frame ile aynıdır. Dönüş: (normalize edilmiş df, parça sayısı).
+    """
+    options = csv_reader_options(data)
+    sample = pd.read_csv(io.BytesIO(data), encoding=CSV_ENCODING, nrows=DATE_SAMPLE_ROWS, **options)
+    sample.columns = [str(c).strip() for c in sample.columns]
+    formats = date_formats(sample.rename(columns=RENAME_MAP))
+    parts = []
+    with pd.read_csv(io.BytesIO(data), encoding=CSV_ENCODING, chunksize=chunksize, **options) as reader:
+        for chunk in reader:
+            parts.append(normalize_frame(chunk, asm_map, formats=formats))
+    if not parts:
+        parts = [normalize_frame(sample, asm_map, formats=formats)]
+    n_chunks = len(parts)
+    return (concat_compact(parts) if n_chunks > 1 else parts[0]), n_chunks
+
+def normalize_frame(temp_df, asm_map, timer=perf.NULL, name=None, formats=None):
+    """Sütunları yeniden adlandırır, ASM eşleştirmesini ve tip dönüşümlerini uygular.
+
+    formats verilmezse tarih biçimleri bu tablonun ilk satırlarından çıkarılır.
+    """
+    temp_df.columns = [str(c).strip() for c in temp_df.columns]
+    df = temp_df.rename(columns={k: v for k, v in RENAME_MAP.items() if k in temp_df.columns})
+    df = df[[c for c in KEEP_COLUMNS if c in df.columns]]
+
+    # --- EKSİK ASM EŞLEŞTİRME ---
+    with timer.stage("ASM eşleştirme", len(df), file=name) as rec:
+        if asm_map and 'birim' in df.columns:
+            mapped_asm = map_units_to_asm(df['birim'], asm_map)
+            rec['rows_out'] = int(mapped_asm.notna().sum())
+            if 'asm' not in df.columns:
+                df['asm'] = mapped_asm
+            else:
+                df['asm'] = df['asm'].fillna(mapped_asm)
+
+        if 'asm' not in df.columns:
+            df['asm'] = "Belirtilmemiş"
+        else:
+            df['asm'] = df['asm'].fillna("Belirtilmemiş")
+
+    with timer.stage("Tip dönüşümü", len(df), file=name) as rec:
+        df = _coerce_types(df, formats)
+        rec['rows_out'] = len(df)
+    return df
+
+def _coerce_types(df, formats=None):
+    """Doz/tarih dönüşümleri, tarihsiz kayıtların atılması ve sıkıştırma."""
+    if 'doz' in df.columns:
+        df['doz'] = pd.to_numeric(df['doz'], errors='coerce').fillna(0).astype(int)
+    else:
+        df['doz'] = 1
+
+    if formats is None:
+        formats = date_formats(df)
+    for col in DATE_COLUMNS:
+        # Biçim verilirse tüm sütun (ve parçalı okumada tüm parçalar) aynı biçimle çevrilir.
+        df[col] = pd.to_datetime(df[col], format=formats.get(col), errors='coerce')
+    df = df.dropna(subset=['hedef_tarih'])
+
+    # Parquet'e yazılabilmesi için karışık tipli metin sütunları string'e çevrilir.
+    for col in TEXT_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+
+    return compact_frame(df.reset_index(drop=True))
+
+def compact_frame(df):
+    """Düşük kardinaliteli metin sütunlarını category'ye, dozu int8'e çevirir."""
+    for col in TEXT_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    if 'doz' in df.columns and df['doz'].dtype != 'int8':
+        doz = df['doz']
+        if len(doz) == 0 or (doz.min() >= -128 and doz.max() <= 127):
+            df['doz'] = doz.astype('int8')
+    return df
+
+def concat_compact(parts):
+    """Parçaları birleştirir; category sütunlarının kategori kümeleri önceden birleştirilir.
+
+    Farklı kategorili parçaları doğrudan birleştirmek sütunu object tipine geri döndürür.
+    """
+    parts = list(parts)
+    unified = {}
+    for col in TEXT_COLUMNS:
+        dtypes = [p[col].dtype for p in parts if col in p.columns]
+        if dtypes and all(isinstance(t, pd.CategoricalDtype) for t in dtypes):
+            unified[col] = pd.Index(sorted(set().union(*(t.categories for t in dtypes))))
+    if unified:
+        aligned = []
+        for p in parts:
+            cols = {c: p[c] for c in p.columns}
+            for col, categories in unified.items():
+                if col in cols:
+                    cols[col] = cols[col].cat.set_categories(categories)
+            aligned.append(pd.DataFrame(cols, copy=False))
+        parts = aligned
+    df = pd.concat(parts, ignore_index=True)
+    return compact_frame(df)
+
+# -----------------------------------------------------------------------------
+# DİSK ÖNBELLEĞİ (PARQUET)
+# -----------------------------------------------------------------------------
+
+def content_key(data, asm_fp):
+    """Dosya içeriği ve ASM eşleştirmesine göre normalize edilmiş verinin anahtarını döndürür."""
+    return f"{file_hash(data)}_{asm_fp}"
+
+def content_key_hash(key):
+    """content_key'den dosya özetini geri verir (dosya yeniden özetlenmez)."""
+    return key.rsplit("_", 1)[0]
+
+def cache_path(content_hash, asm_fp):
+    """Bir dosyanın normalize edilmiş hâlinin önbellek yolunu döndürür."""
+    return os.path.join(CACHE_DIR, f"{content_hash}_{asm_fp}_v{CACHE_VERSION}.parquet")
+
+def read_cached(path):
+    """Önbellekteki Parquet dosyasını okur (yalnızca panelin kullandığı sütunlar saklanır)."""
+    try:
+        df = pd.read_parquet(path)
+    except Exception:
+        return None
+    try:
+        # Değişiklik zamanı son kullanım zamanı olarak tutulur (bkz. prune_cache).
+        os.utime(path)
+    except OSError:
+        pass
+    return df
+
+def write_cached(df, path):
+    """Normalize edilmiş veriyi atomik olarak önbelleğe yazar; hata olursa sessizce geçer."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return
+    prune_cache(keep=path)
+
+def prune_cache(keep=None, max_bytes=None):
+    """Başka CACHE_VERSION'larla yazılmış dosyaları siler; kalanlar sınırı aşarsa en eski kullanılandan başlar.
+
+    Silinemeyen (ör. başka süreçte açık) dosyalar atlanır; keep yolundaki dosya silinmez.
+    """
+    max_bytes = CACHE_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+    suffix = f"_v{CACHE_VERSION}.parquet"
+    try:
+        names = os.listdir(CACHE_DIR)
+    except OSError:
+        return
+    entries = []
+    for name in names:
+        path = os.path.join(CACHE_DIR, name)
+        try:
+            if not name.endswith(suffix):
+                if name.endswith('.parquet'):
+                    os.remove(path)
+                continue
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+
+def load_file(data, name, asm_map, timer=perf.NULL, content_hash=None):
+    """Dosyayı önbellekten ya da okuyup normalize ederek döndürür: (df, önbellekten_mi).
+
+    content_hash verilirse dosya yeniden özetlenmez.
+    """
+    path = cache_path(content_hash or file_hash(data), mapping_fingerprint(asm_map))
+    if os.path.exists(path):
+        with timer.stage("Önbellekten okuma", file=name) as rec:
+            df = read_cached(path)
+            rec['rows_out'] = None if df is None else len(df)
+        if df is not None:
+            return df, True
+
+    if name.endswith('.csv'):
+        # Okuma ve normalizasyon parça parça birlikte yapılır; tek adım olarak ölçülür.
+        with timer.stage("Parçalı CSV okuma", file=name, nbytes=len(data)) as rec:
+            df, rec['chunks'] = read_csv_normalized(data, asm_map)
+            rec['rows_out'] = len(df)
+    else:
+        with timer.stage("Dosya okuma", file=name, nbytes=len(data)) as rec:
+            raw = read_raw(data, name)
+            rec['rows_out'] = len(raw)
+        df = normalize_frame(raw, asm_map, timer, name)
+    with timer.stage("Önbellek yazma", len(df), file=name):
+        write_cached(df, path)
+    return df, False
+
+# -----------------------------------------------------------------------------
+# PARALEL OKUMA (SÜREÇ HAVUZU)
+# -----------------------------------------------------------------------------
+
+_executor = None
+_executor_workers = 0
+_executor_users = 0
+_executor_lock = threading.Lock()
+_idle_timer = None
+
+def get_executor(workers):
+    """Süreç havuzunu döndürür; kullanımdayken işçi sayısı değiştirilmez."""
+    global _executor, _executor_workers
+    if _executor is None or (_executor_workers != workers and _executor_users == 0):
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        # Streamlit çok iş parçacıklı çalıştığı için fork yerine spawn kullanılır.
+        _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        _executor_workers = workers
+    return _executor
+
+def reset_executor():
+    """Bozulan süreç havuzunu kapatır; bir sonraki çağrıda yenisi kurulur."""
+    global _executor, _executor_workers
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+    _executor = None
+    _executor_workers = 0
+
+def _shutdown_if_idle():
+    with _executor_lock:
+        if _executor_users == 0:
+            reset_executor()
+
+@contextmanager
+def borrowed_executor(workers):
+    """Havuzu bir toplu okuma boyunca kullanır.
+
+    Son kullanıcı bıraktığında POOL_IDLE_SECONDS sayacı başlar; bu sürede yeni okuma
+    gelmezse havuz kapatılır (0 ise hemen kapatılır).
+    """
+    global _executor_users, _idle_timer
+    with _executor_lock:
+        if _idle_timer is not None:
+            _idle_timer.cancel()
+            _idle_timer = None
+        executor = get_executor(workers)
+        _executor_users += 1
+    try:
+        yield executor
+    finally:
+        with _executor_lock:
+            _executor_users -= 1
+            if _executor_users == 0:
+                if POOL_IDLE_SECONDS <= 0:
+                    reset_executor()
+                else:
+                    _idle_timer = threading.Timer(POOL_IDLE_SECONDS, _shutdown_if_idle)
+                    _idle_timer.daemon = True
+                    _idle_timer.start()
+
+def _load_file_worker(data, name, asm_map, measure=False, content_hash=None):
+    """İşçi süreçte çalışır; normalize edilmiş DataFrame'i (ve istenirse ölçümleri) geri gönderir."""
+    timer = perf.RecordingTimer() if measure else perf.NULL
+    df = load_file(data, name, asm_map, timer, content_hash)[0]
+    return df, (timer.snapshot() if measure else [])
+
+def load_files(files, asm_map, workers=None, on_progress=None, timer=perf.NULL):
+    """Birden çok dosyayı (anahtar, ad, içerik[, özet]) okur; önbellekte olmayanları paralel işler.
+
+    Özet verilmeyen dosyalar burada bir kez özetlenir; özet işçiye de aktarılır.
+
+    Hatalı dosyalar tüm yüklemeyi durdurmaz; ayrı bir sözlükte raporlanır.
+    Dönüş: (anahtar -> DataFrame, anahtar -> hata mesajı).
+    """
+    workers = INGEST_WORKERS if workers is None else workers
+    asm_fp = mapping_fingerprint(asm_map)
+    frames, errors = {}, {}
+    total = len(files)
+
+    def report(name):
+        if on_progress:
+            on_progress(len(frames) + len(errors), total, name)
+
+    # Önbellekte olanlar ana süreçte okunur; yalnızca ayrıştırılması gerekenler havuza gider.
+    pending = []
+    for key, name, data, *rest in files:
+        content_hash = rest[0] if rest else file_hash(data)
+        path = cache_path(content_hash, asm_fp)
+        cached = None
+        if os.path.exists(path):
+            with timer.stage("Önbellekten okuma", file=name) as rec:
+                cached = read_cached(path)
+                rec['rows_out'] = None if cached is None else len(cached)
+        if cached is not None:
+            frames[key] = cached
+            report(name)
+        else:
+            pending.append((key, name, data, content_hash))
+
+    if len(pending) > 1 and workers > 1:
+        measure = timer is not perf.NULL
+        broken = False
+        try:
+            # Havuz sabit boyutta kurulur; işçiler yalnızca iş geldikçe başlatılır.
+            with borrowed_executor(workers) as executor:
+                futures = {executor.submit(_load_file_worker, data, name, asm_map, measure, content_hash): (key, name)
+                           for key, name, data, content_hash in pending}
+                for future in as_completed(futures):
+                    key, name = futures[future]
+                    try:
+                        frames[key], records = future.result()
+                        timer.add(records)
+                    except BrokenProcessPool:
+                        broken = True
+                        break
+                    except Exception as e:
+                        errors[key] = str(e)
+                    report(name)
+        except BrokenProcessPool:
+            broken = True
+        if not broken:
+            return frames, errors
+
+        # Çöken bir işçi bekleyen tüm işleri düşürür. Sonucu gelmeyen dosyalar yeni havuzda
+        # tek tek yeniden denenir; böylece yalnızca gerçekten çöken dosya hatalı sayılır.
+        reset_executor()
+        for key, name, data, content_hash in pending:
+            if key in frames or key in errors:
+                continue
+            try:
+                with borrowed_executor(workers) as executor:
+                    frames[key], records = executor.submit(_load_file_worker, data, name, asm_map, measure, content_hash).result()
+                timer.add(records)
+            except BrokenProcessPool as e:
+                reset_executor()
+                errors[key] = f"İşçi süreç beklenmedik şekilde sonlandı: {e}"
+            except Exception as e:
+                errors[key] = str(e)
+            report(name)
+        return frames, errors
+
+    for key, name, data, content_hash in pending:
+        try:
+            frames[key] = load_file(data, name, asm_map, timer, content_hash)[0]
+        except Exception as e:
+            errors[key] = str(e)
+        report(name)
+    return frames, errors
+
+# -----------------------------------------------------------------------------
+# DOSYA ANAHTARLARI
+# -----------------------------------------------------------------------------
+
+def upload_key(uploaded_file):
+    """Yüklenen dosya için oturum boyunca sabit kalan bir anahtar döndürür."""
+    return getattr(uploaded_file, 'file_id', None) or f"{uploaded_file.name}:{uploaded_file.size}"
@@ -0,0 +1,132 @@
+"""Adım bazlı süre/bellek ölçümü: panelde 'Performans' bölümü ve yapılandırılmış günlük dosyası."""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Ölçüm ASI_PERF=1 ortam değişkeniyle ya da ?perf=1 sorgu parametresiyle açılır.
+PERF_ENV = "ASI_PERF"
+# Kayıtlar JSON satırları olarak bu dosyaya eklenir (ASI_PERF_LOG; boş bırakılırsa yazılmaz).
+PERF_LOG = os.environ.get(
+    "ASI_PERF_LOG",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "perf.log"),
+)
+# Panelde gösterilen en fazla kayıt sayısı.
+PERF_MAX_RECORDS = 500
+
+_TRUE_VALUES = ("1", "true", "yes", "on", "evet")
+_log_lock = threading.Lock()
+
+
+def enabled(query_value=None):
+    """Ölçüm açık mı? Sorgu parametresi verilmişse ortam değişkeninden önce gelir."""
+    if query_value is not None:
+        return str(query_value).strip().lower() in _TRUE_VALUES
+    return os.environ.get(PERF_ENV, "").strip().lower() in _TRUE_VALUES
+
+
+def rss_bytes():
+    """Sürecin anlık RSS değeri (bayt); /proc olmayan sistemlerde None."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def append_log(records, path=PERF_LOG):
+    """Kayıtları JSON satırları olarak günlük dosyasına ekler; yazılamazsa sessizce geçer."""
+    if not path or not records:
+        return
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        lines = "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in records)
+        with _log_lock, open(path, "a", encoding="utf-8") as f:
+            f.write(lines)
+    except OSError:
+        pass
+
+
+class StageTimer:
+    """Adımların süresini, satır sayılarını ve bellek değişimini kaydeder.
+
+    stage() bağlamında dönen sözlüğe 'rows_out' (ve istenirse başka alanlar) yazılabilir.
+    İndirme düğmeleri ayrı iş parçacığında çalıştığı için kayıt listesi kilitle korunur.
+    """
+
+    def __init__(self, session=None, log_path=PERF_LOG, max_records=PERF_MAX_RECORDS):
+        self.session = session
+        self.log_path = log_path
+        self.run = 0
+        self.records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+
+    def next_run(self):
+        """Yeni bir betik çalıştırması başlatır (kayıtlar çalıştırma numarasıyla gruplanır)."""
+        self.run += 1
+        return self.run
+
+    @contextmanager
+    def stage(self, name, rows_in=None, **extra):
+        rec = {"stage": name, "rows_in": rows_in, "rows_out": None}
+        rec.update(extra)
+        rss_start = rss_bytes()
+        start = time.perf_counter()
+        try:
+            yield rec
+        finally:
+            rec["seconds"] = round(time.perf_counter() - start, 4)
+            rss_end = rss_bytes()
+            rec["mem_delta_mb"] = round((rss_end - rss_start) / 2**20, 1) if rss_start is not None and rss_end is not None else None
+            self.add([rec])
+
+    def add(self, records):
+        """Dışarıda (ör. işçi süreçte) ölçülmüş kayıtları ekler ve günlüğe yazar."""
+        stamped = []
+        for rec in records:
+            rec = dict(rec)
+            rec.setdefault("time", time.strftime("%Y-%m-%dT%H:%M:%S"))
+            rec.setdefault("run", self.run)
+            if self.session is not None: rec.setdefault("session", self.session)
+            stamped.append(rec)
+        with self._lock:
+            self.records.extend(stamped)
+        append_log(stamped, self.log_path)
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.records)
+
+
+class RecordingTimer(StageTimer):
+    """İşçi süreçlerde kullanılır: kayıtları yalnızca biriktirir, günlüğe yazmaz."""
+
+    def __init__(self):
+        super().__init__(log_path=None)
+
+    def add(self, records):
+        with self._lock:
+            self.records.extend(dict(r) for r in records)
+
+
+class NullTimer:
+    """Ölçüm kapalıyken kullanılır; hiçbir şey kaydetmez."""
+
+    def next_run(self):
+        return 0
+
+    @contextmanager
+    def stage(self, name, rows_in=None, **extra):
+        yield {}
+
+    def add(self, records):
+        pass
+
+    def snapshot(self):
+        return []
+
+
+NULL = NullTimer()
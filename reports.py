@@ -0,0 +1,377 @@
+"""Excel ve PDF rapor üretimi."""
+
+import tempfile
+
+import numpy as np
+import pandas as pd
+import fpdf
+import xlsxwriter
+from fpdf import FPDF
+
+# -----------------------------------------------------------------------------
+# METİN TEMİZLEME
+# -----------------------------------------------------------------------------
+
+PDF_EMOJIS = ["🔴", "🟢", "🟠", "✅", "⚠️", "🚨"]
+PDF_REPLACEMENTS = {
+    'ğ': 'g', 'Ğ': 'G', 'ş': 's', 'Ş': 'S', 'ı': 'i', 'İ': 'I',
+    'ü': 'u', 'Ü': 'U', 'ö': 'o', 'Ö': 'O', 'ç': 'c', 'Ç': 'C'
+}
+# Tek karakterlik emojiler ve Türkçe karakterler tek bir çeviri tablosunda toplanır.
+# "⚠️" iki karakterden oluştuğu için ayrıca değiştirilir.
+PDF_TRANSLATION = str.maketrans({
+    **{e: None for e in PDF_EMOJIS if len(e) == 1},
+    **PDF_REPLACEMENTS,
+})
+
+def clean_text(text):
+    """PDF'in çekirdek fontu için emojileri atar, Türkçe karakterleri ve latin-1 dışını dönüştürür."""
+    if not isinstance(text, str): return str(text)
+    text = text.replace("🔴", "").replace("🟢", "").replace("🟠", "").replace("✅", "").replace("⚠️", "").replace("🚨", "")
+    for tr, eng in PDF_REPLACEMENTS.items():
+        text = text.replace(tr, eng)
+    return text.encode('latin-1', 'replace').decode('latin-1')
+
+def as_text(values):
+    """Sütunu, hücre bazında str() ile aynı sonucu verecek şekilde metne çevirir."""
+    if pd.api.types.is_numeric_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype):
+        text = values.astype(str).astype(object)
+        return text.where(values.notna(), 'nan')
+    return values.map(str).astype(object)
+
+def clean_text_column(text):
+    """clean_text'in vektörel karşılığı; metne çevrilmiş bir sütunu tek geçişte temizler."""
+    text = text.astype(object).str.replace("⚠️", "", regex=False).str.translate(PDF_TRANSLATION)
+    # encode('latin-1', 'replace') her kodlanamayan karakteri '?' yapar.
+    return text.str.replace(r'[^\x00-\xff]', '?', regex=True)
+
+# -----------------------------------------------------------------------------
+# EXCEL
+# -----------------------------------------------------------------------------
+
+# Bir çalışma sayfasına sığabilecek en fazla veri satırı (başlık hariç).
+EXCEL_MAX_ROWS = 1_048_575
+# Satırlar bu büyüklükteki gruplarla yazılır; bellek kullanımı grup boyutuyla sınırlı kalır.
+EXCEL_CHUNK_ROWS = 50_000
+# Çıktı bu boyutu aşarsa bellekten geçici dosyaya taşınır.
+EXCEL_SPILL_BYTES = 32 * 1024 * 1024
+# Sütun genişliği hesaplanırken bakılan en fazla örnek satır sayısı.
+EXCEL_WIDTH_SAMPLE = 2000
+EXCEL_DATE_SERIAL_ORIGIN = pd.Timestamp('1899-12-30')
+
+def excel_column_width(values, name, sample_rows=EXCEL_WIDTH_SAMPLE):
+    """Sütun genişliğini tüm sütunu metne çevirmeden, kategori uzunluklarından ya da örnekten bulur."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        categories = values.cat.categories
+        max_len = int(categories.astype(str).str.len().max()) if len(categories) else 0
+    elif pd.api.types.is_datetime64_any_dtype(values.dtype):
+        max_len = 19
+    else:
+        sample = values if len(values) <= sample_rows else pd.concat(
+            [values.head(sample_rows // 2), values.sample(sample_rows // 2, random_state=0)]
+        )
+        max_len = int(sample.map(str).str.len().max()) if len(sample) else 0
+    max_len = max(max_len, len(str(name))) + 2
+    return min(max_len, 50)
+
+def _excel_column_values(values):
+    """Bir parça sütunu, xlsxwriter'ın doğrudan yazabileceği Python değerleri listesine çevirir."""
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        serial = (values - EXCEL_DATE_SERIAL_ORIGIN) / pd.Timedelta(days=1)
+        return [None if pd.isna(v) else v for v in serial.tolist()]
+    if pd.api.types.is_integer_dtype(values.dtype) or pd.api.types.is_bool_dtype(values.dtype):
+        if not values.hasnans:
+            return values.tolist()
+    obj = values.astype(object)
+    return obj.where(values.notna(), None).tolist()
+
+def _width_sample(rows, sample_rows=EXCEL_WIDTH_SAMPLE):
+    """Seçili satır konumlarından genişlik hesabı için örnek konumlar (baş + sabit tohumlu rastgele)."""
+    if len(rows) <= sample_rows:
+        return rows
+    half = sample_rows // 2
+    rest = np.random.default_rng(0).choice(rows[half:], sample_rows - half, replace=False)
+    return np.concatenate([rows[:half], np.sort(rest)])
+
+def write_excel(df, target, sheet_name='Sheet1', chunk_rows=EXCEL_CHUNK_ROWS, rows=None):
+    """Tabloyu xlsxwriter'ın constant_memory kipinde, satır gruplarıyla bir dosyaya/akışa yazar.
+
+    rows verilirse yalnızca bu satır konumları yazılır; tablo önceden kopyalanmaz, her
+    parça konumlardan ayrı ayrı alınır. Satır sayısı bir sayfanın sınırını aşarsa veri
+    ardışık sayfalara bölünür.
+    """
+    workbook = xlsxwriter.Workbook(target, {'constant_memory': True, 'nan_inf_to_errors': True})
+    header_fmt = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+    date_fmt = workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss'})
+    columns = list(df.columns)
+    sample = _width_sample(rows) if rows is not None else None
+    widths = []
+    for col in columns:
+        try:
+            values = df[col] if sample is None else df[col].iloc[sample]
+            widths.append(excel_column_width(values, col))
+        except Exception:
+            widths.append(15)
+    date_cols = {i for i, col in enumerate(columns) if pd.api.types.is_datetime64_any_dtype(df[col].dtype)}
+
+    n_rows = len(df) if rows is None else len(rows)
+    sheet_starts = range(0, max(n_rows, 1), EXCEL_MAX_ROWS)
+    for sheet_no, sheet_start in enumerate(sheet_starts):
+        name = sheet_name if sheet_no == 0 else f"{sheet_name}_{sheet_no + 1}"
+        worksheet = workbook.add_worksheet(name)
+        for i, w in enumerate(widths):
+            worksheet.set_column(i, i, w)
+        for i, col in enumerate(columns):
+            worksheet.write(0, i, str(col), header_fmt)
+
+        sheet_end = min(sheet_start + EXCEL_MAX_ROWS, n_rows)
+        row = 1
+        for start in range(sheet_start, sheet_end, chunk_rows):
+            end = min(start + chunk_rows, sheet_end)
+            chunk = df.iloc[start:end] if rows is None else df.iloc[rows[start:end]]
+            values = [_excel_column_values(chunk[col]) for col in columns]
+            for record in zip(*values):
+                if date_cols:
+                    for i, v in enumerate(record):
+                        if i in date_cols:
+                            if v is not None: worksheet.write_number(row, i, v, date_fmt)
+                        else:
+                            worksheet.write(row, i, v)
+                else:
+                    worksheet.write_row(row, 0, record)
+                row += 1
+    workbook.close()
+
+def to_excel(df, rows=None):
+    """Veriyi Excel formatına çevirir; rows verilirse yalnızca bu satır konumları yazılır.
+
+    Büyük çıktılar üretim sırasında bellekte değil geçici dosyada tutulur.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=EXCEL_SPILL_BYTES) as output:
+        write_excel(df, output, rows=rows)
+        output.seek(0)
+        return output.read()
+
+# -----------------------------------------------------------------------------
+# PDF
+# -----------------------------------------------------------------------------
+
+# Tablo satırları bu y konumunu aştığında yeni sayfaya geçilir.
+PDF_ROW_LIMIT_Y = 175
+PDF_ROW_HEIGHT = 8
+PDF_HEADER_HEIGHT = 10
+
+class ReportPDF(FPDF):
+    """Başlık, filtre bilgisi ve özet satırı içeren yatay A4 rapor sayfası."""
+
+    def __init__(self, report_title, info, **kwargs):
+        super().__init__(**kwargs)
+        self.report_title = report_title
+        self.report_info = info
+
+    def header(self):
+        info = self.report_info
+        try: self.image('logo.png', 10, 8, 33)
+        except: pass
+
+        self.set_y(10)
+        self.set_font('Arial', 'B', 16)
+        self.cell(0, 10, clean_text(self.report_title), 0, 1, 'C')
+
+        self.set_font('Arial', '', 9)
+        self.set_text_color(80, 80, 80)
+
+        date_str = f"Tarih: {info.get('tarih_araligi', '-')}"
+        ilce_txt = info.get('ilce', '-') if info.get('ilce') != "Tümü" else "Tum Ilceler"
+        asm_txt = info.get('asm', '-') if info.get('asm') != "Tümü" else "Tum ASM'ler"
+        asi_txt = info.get('asi', 'Tümü')
+        doz_txt = info.get('doz', '-') if info.get('doz') else "Tum Dozlar"
+
+        filter_str = f"Konum: {ilce_txt} / {asm_txt} | Asi: {asi_txt} (Doz: {doz_txt})"
+        threshold_str = f"Hedef: %{info.get('hedef', 90)} | Alt Sinir: %{info.get('alt_sinir', 70)}"
+
+        self.ln(2)
+        self.cell(0, 5, clean_text(date_str), 0, 1, 'R')
+        self.cell(0, 5, clean_text(filter_str), 0, 1, 'R')
+        self.cell(0, 5, clean_text(threshold_str), 0, 1, 'R')
+        self.ln(3)
+
+        dusuk_sayisi = info.get('dusuk_birim_sayisi', 0)
+
+        if info.get('sadece_sayi_goster') == True:
+            summary_text = f"ACIL MUDAHALE GEREKEN BIRIM SAYISI: {dusuk_sayisi}"
+        else:
+            if info.get('ilce') == "Tümü":
+                basari_etiket = "IL GENEL BASARI ORANI"
+            else:
+                basari_etiket = f"{clean_text(info.get('ilce')).upper()} BASARI ORANI"
+
+            genel_oran = info.get('genel_basari_orani', 0)
+            summary_text = f"{basari_etiket}: %{genel_oran:.2f}   |   Acil Mudahale Gereken Birim: {dusuk_sayisi}"
+
+        self.set_font('Arial', 'B', 11)
+        self.set_text_color(0, 0, 0)
+        self.set_fill_color(230, 230, 230)
+        self.cell(0, 10, summary_text, 0, 1, 'C', fill=True)
+        self.ln(5)
+        self.set_draw_color(150, 150, 150)
+        self.line(10, self.get_y(), 287, self.get_y())
+        self.ln(5)
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font('Arial', 'I', 8)
+        self.cell(0, 10, f'Sayfa {self.page_no()}', 0, 0, 'C')
+
+def pdf_column_widths(df, raw_text, available_width=275):
+    """Sütun genişliklerini ilk 50 satırın metin uzunluklarından bir kez hesaplar."""
+    max_lens = []
+    for col in df.columns:
+        max_l = len(str(col))
+        head_len = raw_text[col].head(50).str.len().max()
+        if pd.notna(head_len) and head_len > max_l: max_l = int(head_len)
+        if col in ['asm', 'birim', 'ASM Adı']:
+            if max_l > 35: max_l = 35
+        if col in ['Başarı Durumu', 'Durum']:
+            if max_l < 20: max_l = 25
+        max_lens.append(max_l)
+
+    total_len = sum(max_lens)
+    col_widths = []
+    if total_len > 0:
+        for l in max_lens:
+            w = (l / total_len) * available_width
+            if w < 20: w = 20
+            col_widths.append(w)
+    else:
+        col_widths = [available_width]
+
+    final_total = sum(col_widths)
+    if final_total > available_width:
+        factor = available_width / final_total
+        col_widths = [w * factor for w in col_widths]
+    return col_widths
+
+def pdf_cell_texts(df, col_widths, raw_text=None):
+    """Hücre metinlerini sütun bazında temizler ve sütun genişliğine göre kısaltır."""
+    texts = []
+    for i, col in enumerate(df.columns):
+        text = clean_text_column(raw_text[col] if raw_text is not None else as_text(df[col]))
+        max_char = int(col_widths[i] / 1.8)
+        too_long = text.str.len() > max_char
+        if too_long.any():
+            text = text.where(~too_long, text.str.slice(stop=max_char - 2) + "..")
+        texts.append(text)
+    return texts
+
+def _string_widths(pdf, text):
+    """Metinlerin geçerli fonttaki genişliklerini (get_string_width ile aynı) vektörel hesaplar."""
+    cw = pdf.current_font['cw']
+    table = np.array([cw.get(chr(i), 0) for i in range(256)], dtype=np.int64)
+    values = text.tolist()
+    lengths = np.fromiter((len(v) for v in values), dtype=np.int64, count=len(values))
+    codes = np.frombuffer("".join(values).encode('latin-1'), dtype=np.uint8)
+    per_char = table[codes]
+    totals = np.zeros(len(values), dtype=np.int64)
+    non_empty = lengths > 0
+    if non_empty.any():
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        totals[non_empty] = np.add.reduceat(per_char, starts[non_empty])
+    return totals * pdf.font_size / 1000.0
+
+def _write_header_row(pdf, columns, col_widths):
+    pdf.set_font("Arial", 'B', 9)
+    pdf.set_fill_color(220, 230, 240)
+    pdf.set_text_color(0, 0, 0)
+    for i, col in enumerate(columns):
+        pdf.cell(col_widths[i], PDF_HEADER_HEIGHT, clean_text(col), 1, 0, 'C', fill=True)
+    pdf.ln()
+    pdf.set_font("Arial", '', 8)
+
+def _write_rows_cellwise(pdf, columns, texts, col_widths):
+    """Satırları hücre hücre pdf.cell ile yazar (genel yol)."""
+    rows = [t.tolist() for t in texts]
+    for r in range(len(texts[0]) if texts else 0):
+        if pdf.get_y() > PDF_ROW_LIMIT_Y:
+            pdf.add_page()
+            _write_header_row(pdf, columns, col_widths)
+        for i in range(len(columns)):
+            pdf.cell(col_widths[i], PDF_ROW_HEIGHT, rows[i][r], 1, 0, 'C')
+        pdf.ln()
+
+# Hızlı yol fpdf 1.7.2'nin iç alanlarını (k, color_flag, _out ...) kullanır; başka sürümde
+# hücre bazlı yola dönülür.
+PDF_FAST_PATH = fpdf.FPDF_VERSION == '1.7.2'
+
+def _write_rows_fast(pdf, columns, texts, col_widths):
+    """Satırları sayfa büyüklüğünde gruplar hâlinde, hücre başına pdf.cell çağırmadan yazar.
+
+    Üretilen PDF komutları pdf.cell(w, 8, txt, 1, 0, 'C') ile birebir aynıdır; yalnızca
+    metin genişlikleri, kaçış karakterleri ve x konumları sütun bazında önceden hesaplanır.
+    """
+    n_rows = len(texts[0]) if texts else 0
+    if n_rows == 0:
+        return
+    k, h, page_h = pdf.k, PDF_ROW_HEIGHT, pdf.h
+    font_size = pdf.font_size
+    q_open = ('q ' + pdf.text_color + ' ') if pdf.color_flag else ''
+    q_close = ' Q' if pdf.color_flag else ''
+
+    rect_prefix, rect_suffix, text_x, escaped, empty = [], [], [], [], []
+    x = pdf.l_margin
+    for i, text in enumerate(texts):
+        w = col_widths[i]
+        rect_prefix.append('%.2f ' % (x * k))
+        rect_suffix.append(' %.2f %.2f re S ' % (w * k, -h * k))
+        dx = (w - _string_widths(pdf, text)) / 2.0
+        text_x.append(['%.2f' % v for v in (x + dx) * k])
+        escaped.append(text.str.replace('\\', '\\\\', regex=False).str.replace(')', '\\)', regex=False)
+                       .str.replace('(', '\\(', regex=False).str.replace('\r', '\\r', regex=False).tolist())
+        empty.append((text == '').to_numpy())
+        x += w
+
+    n_cols = len(columns)
+    r = 0
+    while r < n_rows:
+        if pdf.get_y() > PDF_ROW_LIMIT_Y:
+            pdf.add_page()
+            _write_header_row(pdf, columns, col_widths)
+        y = pdf.y
+        lines = []
+        while r < n_rows and not y > PDF_ROW_LIMIT_Y:
+            rect_y = '%.2f' % ((page_h - y) * k)
+            text_y = '%.2f' % ((page_h - (y + .5 * h + .3 * font_size)) * k)
+            for i in range(n_cols):
+                s = rect_prefix[i] + rect_y + rect_suffix[i]
+                if not empty[i][r]:
+                    s += f"{q_open}BT {text_x[i][r]} {text_y} Td ({escaped[i][r]}) Tj ET{q_close}"
+                lines.append(s)
+            y += h
+            r += 1
+        # Sayfanın tüm satırları tek seferde içerik akışına eklenir.
+        pdf._out("\n".join(lines))
+        pdf.lasth = h
+        pdf.x = pdf.l_margin
+        pdf.y = y
+
+def create_pdf(df, title, info, fast=True):
+    """PDF Oluşturucu
+
+    fast=True: hücre metinleri sütun bazında hazırlanır ve satırlar sayfa gruplarıyla yazılır.
+    fast=False: her hücre için pdf.cell çağrılır (karşılaştırma ve yedek yol).
+    """
+    pdf = ReportPDF(title, info, orientation='L', unit='mm', format='A4')
+    pdf.alias_nb_pages()
+    pdf.add_page()
+
+    raw_text = {col: as_text(df[col]) for col in df.columns}
+    col_widths = pdf_column_widths(df, raw_text)
+    texts = pdf_cell_texts(df, col_widths, raw_text)
+
+    _write_header_row(pdf, df.columns, col_widths)
+    if fast and PDF_FAST_PATH and not pdf.unifontsubset:
+        _write_rows_fast(pdf, df.columns, texts, col_widths)
+    else:
+        _write_rows_cellwise(pdf, df.columns, texts, col_widths)
+
+    return pdf.output(dest='S').encode('latin-1')
@@ -0,0 +1,119 @@
+"""Oturumlar arasında paylaşılan, salt okunur veri kümesi kaydı."""
+
+import hashlib
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+# Paylaşılan verilerin toplam bellek bütçesi (ASI_SHARED_MEMORY_MB).
+MEMORY_BUDGET_MB = int(os.environ.get("ASI_SHARED_MEMORY_MB", "2048"))
+
+
+def frame_nbytes(df):
+    """DataFrame'in bellekteki yaklaşık boyutunu (bayt) döndürür."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def combined_key(keys):
+    """Dosya anahtarları listesinden birleşik veri kümesi anahtarı üretir (sıra önemlidir).
+
+    Tek dosyalık kümeler dosyanın kendi kaydını kullanır; veri iki kez saklanmaz.
+    """
+    if len(keys) == 1:
+        return keys[0]
+    return "set_" + hashlib.sha256("\n".join(keys).encode("utf-8")).hexdigest()
+
+
+class DatasetHandle:
+    """Bir oturumun paylaşılan veri kümesine tuttuğu referans.
+
+    Tutamak yaşadığı sürece veri kümesi bellekten atılmaz; oturum kapandığında
+    tutamak çöp toplayıcı tarafından silinir ve referans sayısı kendiliğinden düşer.
+    """
+
+    __slots__ = ("key", "frame", "__weakref__")
+
+    def __init__(self, key, frame):
+        self.key = key
+        self.frame = frame
+
+
+class _Entry:
+    __slots__ = ("frame", "nbytes", "handles", "last_used")
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.nbytes = frame_nbytes(frame)
+        self.handles = weakref.WeakSet()
+        self.last_used = time.time()
+
+
+class DatasetRegistry:
+    """İçerik özetine göre anahtarlanan, referans sayımlı ve LRU ile boşaltılan veri kaydı.
+
+    Kayıttaki DataFrame'ler oturumlar arasında paylaşıldığı için salt okunur kabul edilir;
+    üzerlerinde yerinde değişiklik yapılmamalıdır.
+    """
+
+    def __init__(self, budget_bytes=MEMORY_BUDGET_MB * 1024 * 1024):
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key):
+        """Kayıtlı veri kümesi için yeni bir tutamak döndürür; yoksa None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            entry.last_used = time.time()
+            handle = DatasetHandle(key, entry.frame)
+            entry.handles.add(handle)
+            return handle
+
+    def peek(self, key):
+        """Referans almadan kayıtlı DataFrame'i döndürür (geçici okuma için); yoksa None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry.frame
+
+    def put(self, key, frame):
+        """Veri kümesini kaydeder (varsa mevcut olanı korur) ve bir tutamak döndürür."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _Entry(frame)
+                self._entries[key] = entry
+            self._entries.move_to_end(key)
+            entry.last_used = time.time()
+            handle = DatasetHandle(key, entry.frame)
+            entry.handles.add(handle)
+            self._evict()
+            return handle
+
+    def _evict(self):
+        """Bütçe aşıldıysa kullanılmayan en eski veri kümelerini atar (kilit altında çağrılır)."""
+        total = sum(e.nbytes for e in self._entries.values())
+        for key in list(self._entries):
+            if total <= self.budget_bytes:
+                break
+            entry = self._entries[key]
+            if len(entry.handles) == 0:
+                total -= entry.nbytes
+                del self._entries[key]
+
+    def stats(self):
+        """Kayıt durumunu döndürür: veri kümesi sayısı, toplam bayt, aktif referans sayısı."""
+        with self._lock:
+            return {
+                "datasets": len(self._entries),
+                "nbytes": sum(e.nbytes for e in self._entries.values()),
+                "handles": sum(len(e.handles) for e in self._entries.values()),
+                "budget_bytes": self.budget_bytes,
+            }
@@ -0,0 +1,296 @@
+"""Çevrimdışı ön hesaplama: bırakma klasörünü izler ve panelin doğrudan açtığı veri sürümleri yayınlar.
+
+Kullanım:
+    python snapshots.py --klasor gelen_veriler              # klasörü sürekli izle
+    python snapshots.py --klasor gelen_veriler --bir-kez    # bir kez işle ve çık
+
+Klasördeki Excel/CSV dosyaları panelle aynı normalizasyonla okunur (ingest.load_files);
+normalize edilmiş veri, küp, eşleşmeyen birimler ve varsayılan eşiklerle ilçe raporları yeni
+bir sürüm klasörüne yazılır. Sürüm tamamlanınca CURRENT işaretçisi atomik olarak ona çevrilir;
+panel dosya yüklenmemişse son sürümü salt okunur açar. Eski sürümlerden SNAPSHOT_KEEP kadarı tutulur.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+import pandas as pd
+
+import analysis
+import asm_mapping
+import batch_report
+import ingest
+
+# Sürümlerin yayınlandığı klasör (ASI_SNAPSHOT_DIR).
+SNAPSHOT_DIR = os.environ.get(
+    "ASI_SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "snapshots"),
+)
+# Silinmeden tutulan en yeni sürüm sayısı (açık oturumlar eski sürümü okumaya devam edebilir).
+SNAPSHOT_KEEP = 3
+POINTER_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+DATA_FILE = "veri.parquet"
+CUBE_FILE = "kup.parquet"
+UNMATCHED_FILE = "eslesmeyen_birimler.parquet"
+REPORT_DIR = "raporlar"
+DATA_EXTENSIONS = ('.xlsx', '.csv')
+# Yarım kalmış yayın klasörleri bu süreden eskiyse temizlenir (sn).
+STALE_TMP_SECONDS = 24 * 3600
+
+# -----------------------------------------------------------------------------
+# 1. KLASÖR TARAMA
+# -----------------------------------------------------------------------------
+
+def scan_drop_dir(drop_dir):
+    """Bırakma klasöründeki veri dosyaları: (yol, boyut, mtime_ns) listesi, ada göre sıralı.
+
+    Gizli dosyalar ve Excel kilit dosyaları (~$...) atlanır.
+    """
+    entries = []
+    try:
+        names = sorted(os.listdir(drop_dir))
+    except FileNotFoundError:
+        return entries
+    for name in names:
+        if name.startswith(('.', '~$')) or not name.lower().endswith(DATA_EXTENSIONS):
+            continue
+        path = os.path.join(drop_dir, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        entries.append((path, st.st_size, st.st_mtime_ns))
+    return entries
+
+def source_signature(entries, asm_fp, target, minimum):
+    """Girdi dosyaları, ASM eşleştirmesi ve rapor eşiklerinden sürüm imzası; değişmediyse yeniden yayın yapılmaz."""
+    text = "\n".join(f"{os.path.basename(p)}|{size}|{mtime}" for p, size, mtime in entries)
+    text += f"\n{asm_fp}|{target}|{minimum}|{ingest.CACHE_VERSION}"
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+# -----------------------------------------------------------------------------
+# 2. YAYINLAMA
+# -----------------------------------------------------------------------------
+
+def current_version(snapshot_dir=SNAPSHOT_DIR):
+    """Yayındaki sürümün adı; henüz yayın yoksa None."""
+    try:
+        with open(os.path.join(snapshot_dir, POINTER_FILE), encoding="utf-8") as f:
+            version = f.read().strip()
+    except OSError:
+        return None
+    return version if version and os.path.isdir(os.path.join(snapshot_dir, version)) else None
+
+def read_manifest(path):
+    try:
+        with open(os.path.join(path, MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_pointer(snapshot_dir, version):
+    """CURRENT işaretçisini atomik olarak günceller (okuyucular hiçbir zaman yarım sürüm görmez)."""
+    path = os.path.join(snapshot_dir, POINTER_FILE)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp_path, path)
+
+def build_snapshot(entries, out_dir, target, minimum, formats=('pdf', 'xlsx'), workers=None):
+    """Sürüm içeriğini out_dir'e yazar ve manifest sözlüğünü döndürür; okunabilen dosya yoksa None."""
+    start = time.perf_counter()
+    paths = [p for p, _, _ in entries]
+    df, errors = batch_report.load_inputs(paths, workers=workers)
+    if df is None:
+        return None
+    cube = analysis.build_cube(df)
+    eksik = (cube['asm'] == "Belirtilmemiş").to_numpy()
+    unmatched = asm_mapping.unmatched_units(cube['birim'][eksik], cube['hedef'][eksik])
+
+    os.makedirs(out_dir, exist_ok=True)
+    df.to_parquet(os.path.join(out_dir, DATA_FILE), index=False)
+    cube.to_parquet(os.path.join(out_dir, CUBE_FILE), index=False)
+    unmatched.to_parquet(os.path.join(out_dir, UNMATCHED_FILE), index=False)
+
+    reports = []
+    if formats:
+        jobs = batch_report.build_jobs(df, target, minimum, cube=cube)
+        written, report_errors = batch_report.render_all(jobs, os.path.join(out_dir, REPORT_DIR), formats, workers=workers)
+        reports = sorted(os.path.relpath(p, out_dir) for files in written.values() for p in files)
+        errors.update({f"rapor:{name}": hata for name, hata in report_errors.items()})
+
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "files": [{"name": os.path.basename(p), "size": size, "mtime_ns": mtime} for p, size, mtime in entries],
+        "errors": {os.path.basename(k): v for k, v in errors.items()},
+        "rows": len(df), "cube_rows": len(cube), "unmatched_units": len(unmatched),
+        "hedef": target, "alt_sinir": minimum, "reports": reports,
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+
+def publish(drop_dir, snapshot_dir=SNAPSHOT_DIR, target=90, minimum=70, formats=('pdf', 'xlsx'),
+            workers=None, entries=None, force=False):
+    """Klasörü işler ve yeni sürüm yayınlar; girdiler değişmemişse ya da veri okunamazsa None döner.
+
+    Sürüm önce geçici bir klasörde hazırlanır, tamamlanınca yeniden adlandırılır ve ancak
+    ondan sonra CURRENT işaretçisi çevrilir.
+    """
+    entries = scan_drop_dir(drop_dir) if entries is None else entries
+    if not entries:
+        return None
+    asm_fp = ingest.mapping_fingerprint(asm_mapping.load_asm_mapping())
+    signature = source_signature(entries, asm_fp, target, minimum)
+    current = current_version(snapshot_dir)
+    if not force and current:
+        manifest = read_manifest(os.path.join(snapshot_dir, current))
+        if manifest and manifest.get("signature") == signature:
+            return None
+
+    version = f"{time.strftime('%Y%m%d-%H%M%S')}-{signature[:8]}"
+    tmp_dir = os.path.join(snapshot_dir, f".tmp-{version}-{os.getpid()}")
+    try:
+        manifest = build_snapshot(entries, tmp_dir, target, minimum, formats, workers)
+        if manifest is None:
+            return None
+        manifest.update(version=version, signature=signature, asm_fp=asm_fp)
+        with open(os.path.join(tmp_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.rename(tmp_dir, os.path.join(snapshot_dir, version))
+    finally:
+        if os.path.isdir(tmp_dir):
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    write_pointer(snapshot_dir, version)
+    prune_snapshots(snapshot_dir)
+    return manifest
+
+def prune_snapshots(snapshot_dir=SNAPSHOT_DIR, keep=SNAPSHOT_KEEP):
+    """Yayındaki sürüm dışında en yeni keep sürümü tutar; eski ve yarım kalmış klasörleri siler."""
+    current = current_version(snapshot_dir)
+    versions = sorted(n for n in os.listdir(snapshot_dir)
+                      if not n.startswith('.') and os.path.isdir(os.path.join(snapshot_dir, n)))
+    for name in versions[:-keep] if keep else versions:
+        if name != current:
+            shutil.rmtree(os.path.join(snapshot_dir, name), ignore_errors=True)
+    now = time.time()
+    for name in os.listdir(snapshot_dir):
+        path = os.path.join(snapshot_dir, name)
+        if name.startswith('.tmp-') and now - os.path.getmtime(path) > STALE_TMP_SECONDS:
+            shutil.rmtree(path, ignore_errors=True)
+
+# -----------------------------------------------------------------------------
+# 3. OKUMA (PANEL)
+# -----------------------------------------------------------------------------
+
+class Snapshot:
+    """Yayınlanmış bir sürümün içeriği; panel bu verileri yalnızca okur."""
+
+    __slots__ = ("version", "path", "manifest", "frame", "cube", "unmatched")
+
+    def __init__(self, version, path, manifest, frame, cube, unmatched):
+        self.version = version
+        self.path = path
+        self.manifest = manifest
+        self.frame = frame
+        self.cube = cube
+        self.unmatched = unmatched
+
+    @property
+    def key(self):
+        """Paylaşılan veri kaydındaki anahtar (yüklenen dosya anahtarlarıyla çakışmaz)."""
+        return f"snapshot_{self.manifest.get('signature', self.version)}"
+
+    def province_reports(self):
+        """Varsayılan eşiklerle üretilmiş il geneli raporların tam yolları."""
+        prefix = os.path.join(REPORT_DIR, batch_report.PROVINCE_DIR) + os.sep
+        return [os.path.join(self.path, r) for r in self.manifest.get('reports', []) if r.startswith(prefix)]
+
+def open_snapshot(version, snapshot_dir=SNAPSHOT_DIR):
+    """Sürümü okur; klasör silinmiş ya da bozuksa None."""
+    path = os.path.join(snapshot_dir, version)
+    manifest = read_manifest(path)
+    if manifest is None:
+        return None
+    try:
+        frame = pd.read_parquet(os.path.join(path, DATA_FILE))
+        cube = pd.read_parquet(os.path.join(path, CUBE_FILE))
+        unmatched = pd.read_parquet(os.path.join(path, UNMATCHED_FILE))
+    except Exception:
+        return None
+    return Snapshot(version, path, manifest, frame, cube, unmatched)
+
+# -----------------------------------------------------------------------------
+# 4. İZLEME VE KOMUT SATIRI
+# -----------------------------------------------------------------------------
+
+def log(message):
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {message}", flush=True)
+
+def report_published(manifest):
+    log(f"Sürüm yayınlandı: {manifest['version']} ({manifest['rows']:,} kayıt, "
+        f"{len(manifest['files'])} dosya, {len(manifest['reports'])} rapor, {manifest['seconds']} sn)")
+    for name, hata in manifest['errors'].items():
+        log(f"  Hata ({name}): {hata}")
+
+def watch(drop_dir, snapshot_dir=SNAPSHOT_DIR, interval=30, **options):
+    """Klasörü aralıklarla tarar; dosyalar bir tarama boyunca değişmeden kaldığında yayın yapar.
+
+    Kopyalanmakta olan dosyalar boyut/zaman damgası değiştiği için bir sonraki taramaya kalır.
+    """
+    previous = None
+    while True:
+        entries = scan_drop_dir(drop_dir)
+        if entries and entries == previous:
+            try:
+                manifest = publish(drop_dir, snapshot_dir, entries=entries, **options)
+                if manifest:
+                    report_published(manifest)
+            except Exception as e:
+                log(f"Yayın başarısız: {e}")
+        previous = entries
+        time.sleep(interval)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Bırakma klasörünü izleyip panel için hazır veri sürümleri yayınlar.")
+    parser.add_argument('--klasor', required=True, help="Yeni Excel/CSV dosyalarının bırakıldığı klasör")
+    parser.add_argument('--yayin', default=SNAPSHOT_DIR, help="Sürümlerin yayınlanacağı klasör")
+    parser.add_argument('--aralik', type=float, default=30, help="Tarama aralığı (sn)")
+    parser.add_argument('--bir-kez', action='store_true', help="Klasörü bir kez işle ve çık")
+    parser.add_argument('--zorla', action='store_true', help="Girdiler değişmemiş olsa da yeni sürüm yayınla")
+    parser.add_argument('--hedef', type=int, default=90, help="Varsayılan raporların hedef başarısı (%%)")
+    parser.add_argument('--alt-sinir', type=int, default=70, help="Varsayılan raporların alt sınırı (%%)")
+    parser.add_argument('--format', choices=['pdf', 'xlsx', 'hepsi', 'yok'], default='hepsi', help="Varsayılan rapor biçimi")
+    parser.add_argument('--isci', type=int, default=None, help="Paralel işçi süreç sayısı")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.makedirs(args.yayin, exist_ok=True)
+    formats = {'hepsi': ('pdf', 'xlsx'), 'yok': ()}.get(args.format, (args.format,))
+    options = dict(target=args.hedef, minimum=args.alt_sinir, formats=formats, workers=args.isci)
+
+    if args.bir_kez:
+        manifest = publish(args.klasor, args.yayin, force=args.zorla, **options)
+        if manifest:
+            report_published(manifest)
+        else:
+            log(f"Yeni sürüm yok (yayındaki: {current_version(args.yayin) or '-'}).")
+        return 0
+
+    log(f"'{args.klasor}' izleniyor ({args.aralik:g} sn aralıkla), yayın: {args.yayin}")
+    if args.zorla:
+        manifest = publish(args.klasor, args.yayin, force=True, **options)
+        if manifest:
+            report_published(manifest)
+    try:
+        watch(args.klasor, args.yayin, args.aralik, **options)
+    except KeyboardInterrupt:
+        log("Durduruldu.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
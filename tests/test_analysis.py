@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import analysis
+
+def _cube(n=400):
+    rng = np.random.default_rng(1)
+    hedef = rng.integers(1, 200, n)
+    return pd.DataFrame({
+        'ilce': rng.choice(['KADIKÖY', 'ŞİŞLİ', 'ÜSKÜDAR'], n),
+        'asm': [f'ASM {i % 60}' for i in range(n)],
+        'birim': [f'BİRİM {i}' for i in range(n)],
+        'hedef': hedef,
+        'yapilan': rng.integers(0, hedef + 1),
+    })
+
+@pytest.mark.parametrize("target, minimum", [(90, 70), (50, 95), (60, 60)])
+def test_risky_asms_follow_min_threshold(target, minimum):
+    rates = analysis.UnitRates(_cube())
+    ozet = rates.ozet
+    # Referans: en az bir birimi alt sınırın altında kalan ASM'ler ve bu birimlerin sayısı.
+    expected = ozet[ozet['oran'] < minimum].groupby(['ilce', 'asm']).size().sort_index()
+
+    riskli = analysis.risky_asm_table(ozet, target, minimum)
+    assert riskli.set_index(['İlçe', 'ASM Adı'])[analysis.STATUS_RED].sort_index().tolist() == expected.tolist()
+
+    hizli = rates.risky_asms(target, minimum)
+    pd.testing.assert_frame_equal(hizli, riskli, check_dtype=False)
+    # Acil müdahale birim sayısı ile riskli ASM'lerdeki kırmızı birimler çelişmez.
+    assert hizli[analysis.STATUS_RED].sum() == len(rates.low_units(minimum))
+
+def test_rate_index_codes_match_classify_rates():
+    rates = pd.Series([10.0, 55.0, 70.0, 80.0, 96.0, np.nan, 100.0])
+    index = analysis.RateIndex(rates)
+    for target, minimum in [(90, 70), (50, 95), (70, 70), (0, 100)]:
+        expected = analysis.classify_rates(rates, target, minimum).cat.codes.to_numpy()
+        assert index.codes(target, minimum).tolist() == expected.tolist()
@@ -0,0 +1,57 @@
+import os
+
+import pandas as pd
+import pytest
+
+import ingest
+
+HEADER = "ILCE,BIRIM_ADI,ASI_SON_TARIH,ASI_YAP_TARIH,ASI_DOZU,ASI_ADI\n"
+
+def _csv(dates):
+    rows = [f"ŞİŞLİ,BİRİM {i % 3},{d},{d if i % 2 else ''},1,BCG\n" for i, d in enumerate(dates)]
+    return (HEADER + "".join(rows)).encode(ingest.CSV_ENCODING)
+
+# İlk satırlarda gün/ay sırası belirsiz, sonrakilerde gün 12'den büyük.
+DAY_FIRST = ["05.03.2024", "01.02.2024", "12.11.2024", "07.07.2024"] * 3 + ["25.03.2024", "13.01.2024", "31.12.2024"] * 3
+
+@pytest.mark.parametrize("chunksize", [1, 4, 7, 1000])
+def test_day_first_dates_across_chunks(chunksize):
+    data = _csv(DAY_FIRST)
+    expected = ingest.normalize_frame(ingest.read_raw(data, "x.csv"), {})
+    df, _ = ingest.read_csv_normalized(data, {}, chunksize)
+    pd.testing.assert_frame_equal(df, expected)
+    assert len(df) == len(DAY_FIRST)
+    assert df['hedef_tarih'].iloc[0] == pd.Timestamp("2024-03-05")
+    assert df['hedef_tarih'].iloc[-1] == pd.Timestamp("2024-12-31")
+
+def test_year_first_dates_stay_month_day():
+    data = _csv(["2024-03-05", "2024-01-02"] * 5)
+    df, _ = ingest.read_csv_normalized(data, {}, 3)
+    assert df['hedef_tarih'].iloc[0] == pd.Timestamp("2024-03-05")
+    assert len(df) == 10
+
+def test_prune_cache_drops_old_versions_and_oldest_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest, "CACHE_DIR", str(tmp_path))
+    old_version = tmp_path / f"abc_nomap_v{ingest.CACHE_VERSION - 1}.parquet"
+    old_version.write_bytes(b"x" * 10)
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"h{i}_nomap_v{ingest.CACHE_VERSION}.parquet"
+        path.write_bytes(b"x" * 100)
+        os.utime(path, (1000 + i, 1000 + i))
+        paths.append(path)
+
+    ingest.prune_cache(keep=str(paths[0]), max_bytes=200)
+    # Eski sürüm her zaman, sınır aşıldığı için de korunmayan en eski dosya silinir.
+    assert not old_version.exists()
+    assert [p.exists() for p in paths] == [True, False, True]
+
+def test_write_cached_keeps_new_file_under_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(ingest, "CACHE_MAX_MB", 0)
+    df = ingest.normalize_frame(ingest.read_raw(_csv(DAY_FIRST), "x.csv"), {})
+    first, second = ingest.cache_path("a", "nomap"), ingest.cache_path("b", "nomap")
+    ingest.write_cached(df, first)
+    ingest.write_cached(df, second)
+    assert not os.path.exists(first)
+    pd.testing.assert_frame_equal(ingest.read_cached(second), df)
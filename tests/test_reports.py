@@ -0,0 +1,37 @@
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import reports
+
+META = {"tarih_araligi": "Tümü", "ilce": "Tümü", "asm": "Tümü", "asi": "Tümü", "doz": "",
+        "hedef": 90, "alt_sinir": 70, "genel_basari_orani": 80.5, "dusuk_birim_sayisi": 5}
+
+def _strip_date(data):
+    # Oluşturma zamanı saniye hassasiyetinde yazıldığından iki çıktı arasında değişebilir.
+    return re.sub(rb"/CreationDate \(D:\d+\)", b"", data)
+
+def _frame(n):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'ilce': rng.choice(['KADIKÖY', 'ŞİŞLİ', 'ÜSKÜDAR (x)', 'a\\b'], n),
+        'asm': rng.choice(['İSTANBUL KADIKÖY 1 NOLU AİLE SAĞLIĞI MERKEZİ çok uzun bir ad', 'ÇAMLICA',
+                           '🔴 Acil ⚠️ Müdahale', '', 'Ωmega'], n),
+        'birim': [f'BİRİM {i} NOLU' for i in range(n)],
+        'toplam': rng.integers(1, 500, n),
+        'yapilan': rng.integers(0, 500, n),
+        'oran': np.round(rng.random(n) * 100, 2),
+    })
+    if n > 3:
+        df.loc[3, 'oran'] = np.nan
+    return df
+
+@pytest.mark.skipif(not reports.PDF_FAST_PATH, reason="hızlı yol yalnızca fpdf 1.7.2 ile çalışır")
+@pytest.mark.parametrize("n", [0, 1, 45, 300])
+def test_fast_pdf_matches_cellwise(n):
+    df = _frame(n)
+    fast = reports.create_pdf(df, "Birim Performans", META, fast=True)
+    cellwise = reports.create_pdf(df, "Birim Performans", META, fast=False)
+    assert _strip_date(fast) == _strip_date(cellwise)